@@ -0,0 +1,163 @@
+"""
+Offline simulation of the user goal resets.
+
+Seeds users spread across every common timezone, each with a daily, weekly, monthly and yearly goal. The scheduling
+clock is then swapped for a VirtualClock, which jumps straight to each pending reset time in turn, so a whole year of
+resets can be run through Goal.task_reset in seconds.
+
+Goal.task_reset resets every goal which is due, so any goals already in the database will be reset along with the
+seeded ones.
+
+Usage (from the repository root):
+    python -m benchmarks.goal_reset --confirm-db writerbot_dev --users 5000 --days 365
+
+To measure the reset engine at 1M goals (250k users, each with four goals), run a shorter period at that size:
+    python -m benchmarks.goal_reset --confirm-db writerbot_dev --users 250000 --days 14
+"""
+import asyncio, lib, pytz
+from benchmarks import helpers
+from structures.clock import Clock, VirtualClock
+from structures.goal import Goal
+
+TYPES = ['daily', 'weekly', 'monthly', 'yearly']
+
+
+def seed(db, users):
+    """
+    Seed the users with their timezone settings and goals, with the reset times calculated from the current clock
+    :param db:
+    :param users:
+    :return: list The seeded user ids
+    """
+    timezones = pytz.common_timezones
+    ids = helpers.get_user_ids(users)
+
+    # Lots of users share a timezone, so only calculate each reset time once.
+    resets = {}
+    goals = []
+    settings = []
+
+    for i, user in enumerate(ids):
+
+        timezone = timezones[i % len(timezones)]
+        settings.append({'user': user, 'guild': None, 'setting': 'timezone', 'value': timezone})
+
+        for type in TYPES:
+            if (timezone, type) not in resets:
+                resets[(timezone, type)] = lib.get_midnight_utc(timezone, type)
+            goals.append({'user': user, 'type': type, 'goal': 500, 'current': 100, 'completed': 0, 'reset': resets[(timezone, type)]})
+
+    helpers.insert_rows(db, 'user_settings', settings)
+    helpers.insert_rows(db, 'user_goals', goals)
+
+    return ids
+
+
+def cleanup(db, users):
+    """
+    Delete everything which was seeded, or created by the resets
+    :param db:
+    :param users:
+    :return:
+    """
+    helpers.delete_in(db, 'user_settings', 'user', users)
+    helpers.delete_in(db, 'user_goals', 'user', users)
+    helpers.delete_in(db, 'user_goals_history', 'user', users)
+
+
+def count_history(db, users):
+    """
+    Count the history records created for the seeded users, by goal type
+    :param db:
+    :param users:
+    :return: dict
+    """
+    counts = {type: 0 for type in TYPES}
+    for i in range(0, len(users), helpers.INSERT_CHUNK):
+        chunk = users[i:i + helpers.INSERT_CHUNK]
+        sql = 'SELECT type, COUNT(*) AS total FROM user_goals_history WHERE user IN (' + ', '.join(['%s'] * len(chunk)) + ') GROUP BY type'
+        for row in db.get_all_sql(sql, chunk):
+            counts[row['type']] = counts.get(row['type'], 0) + int(row['total'])
+    return counts
+
+
+async def run(db, bot, clock, end, step):
+    """
+    Move the clock forward until the end time, running the goal resets each time it moves
+    :param db:
+    :param bot:
+    :param clock:
+    :param end: Timestamp to stop at
+    :param step: Seconds to move the clock each time, or 0 to jump straight to the next pending reset
+    :return: dict
+    """
+    goal = Goal()
+    ticks = 0
+    slowest = 0.0
+    queries = db.cursor.queries
+
+    with helpers.Timer() as timer:
+        while True:
+
+            if step > 0:
+                next = clock.time() + step
+            else:
+                # Goals which can't be reset (e.g. an invalid timezone) stay behind the clock, so skip past them.
+                record = db.get_sql('SELECT MIN(reset) AS next FROM user_goals WHERE reset > %s', [int(clock.time())])
+                next = int(record['next']) if record and record['next'] is not None else end + 1
+
+            if next > end:
+                break
+
+            clock.set(next)
+            with helpers.Timer() as reset:
+                await goal.task_reset(bot)
+            slowest = max(slowest, reset.elapsed)
+            ticks += 1
+
+    return {'ticks': ticks, 'queries': db.cursor.queries - queries, 'duration': timer.elapsed, 'slowest': slowest}
+
+
+def main():
+
+    parser = helpers.get_parser('Benchmark a simulated period of user goal resets')
+    parser.add_argument('--users', type=int, default=5000, help='Number of users to seed, each with all four goal types')
+    parser.add_argument('--days', type=int, default=365, help='Number of days to simulate')
+    parser.add_argument('--step', type=int, default=0, help='Seconds to advance the clock each pass (e.g. 900 to match the scheduled task). Default jumps to the next reset.')
+    args = parser.parse_args()
+
+    db = helpers.connect(args)
+    bot = helpers.FakeBot()
+
+    clock = VirtualClock()
+    Clock.use(clock)
+    start = clock.time()
+
+    with helpers.Timer() as timer:
+        users = seed(db, args.users)
+    helpers.report('Seeded', [('users', args.users), ('timezones', min(args.users, len(pytz.common_timezones))), ('goals', args.users * len(TYPES)), ('seconds', timer.elapsed)])
+
+    try:
+        result = asyncio.run(run(db, bot, clock, start + (args.days * 86400), args.step))
+        counts = count_history(db, users)
+        resets = sum(counts.values())
+
+        helpers.report('Simulated ' + str(args.days) + ' days', [
+            ('duration (s)', result['duration']),
+            ('passes', result['ticks']),
+            ('slowest pass (s)', result['slowest']),
+            ('resets', resets),
+            ('resets per second', resets / result['duration'] if result['duration'] > 0 else 0.0),
+            ('queries', result['queries']),
+            ('queries per reset', result['queries'] / resets if resets > 0 else 0.0),
+        ])
+        helpers.report('Resets per user', [(type, count / args.users) for type, count in counts.items()])
+
+    finally:
+        Clock.use(None)
+        if not args.keep:
+            cleanup(db, users)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The benchmarks seed rows into the database configured in settings.json, so they must only ever be pointed at a local
+development database. Each script requires the database name to be passed with --confirm-db as a safety check, and
+removes everything it seeded once it has finished.
+"""
+import argparse, lib, sys, time
+from structures.db import Database
+
+# Discord ids used for the seeded rows. These are far beyond any real snowflake, so they can't clash with real data.
+BENCH_GUILD = 9100000000000000000
+BENCH_CHANNEL = 9100000000000000001
+BENCH_USER_OFFSET = 9200000000000000000
+
+INSERT_CHUNK = 5000
+
+
+class CountingCursor:
+    """
+    Wraps the database cursor, to count the number of queries which are sent to the database.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.queries = 0
+
+    def execute(self, sql, params=None):
+        self.queries += 1
+        return self._cursor.execute(sql, params)
+
+    def executemany(self, sql, params):
+        self.queries += 1
+        return self._cursor.executemany(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class FakeChannel:
+
+    def __init__(self, id):
+        self.id = id
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+
+class FakeMember:
+
+    def __init__(self, id):
+        self.id = id
+        self.display_name = 'Writer ' + str(id)
+        self.mention = '<@' + str(id) + '>'
+
+
+class FakeGuild:
+
+    def __init__(self, id):
+        self.id = id
+        self.name = 'Benchmark'
+        self.members = []
+
+    def get_member(self, id):
+        return FakeMember(id)
+
+    async def fetch_member(self, id):
+        return FakeMember(id)
+
+    async def query_members(self, limit=5, cache=True, user_ids=None):
+        return [FakeMember(id) for id in (user_ids or [])][:limit]
+
+
+class FakeBot:
+    """
+    Stands in for the discord bot. Channels and guilds always exist, and sending a message does nothing.
+    """
+
+    def __init__(self):
+        self.channel = FakeChannel(BENCH_CHANNEL)
+        self.guild = FakeGuild(BENCH_GUILD)
+        self.guilds = [self.guild]
+
+    def get_channel(self, id):
+        return self.channel
+
+    def get_guild(self, id):
+        return self.guild
+
+
+def get_parser(description):
+    """
+    Get an argument parser with the options every benchmark needs
+    :param description:
+    :return: ArgumentParser
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--confirm-db', required=True, help='Name of the database in settings.json. Must be a local development database, as rows are seeded into it.')
+    parser.add_argument('--keep', action='store_true', help='Keep the seeded rows, instead of deleting them at the end.')
+    return parser
+
+
+def connect(args):
+    """
+    Connect to the database, after checking it is the one the user confirmed, and start counting queries
+    :param args:
+    :return: Database
+    """
+    config = lib.get('./settings.json')
+    if args.confirm_db != config.db_name:
+        sys.exit('--confirm-db does not match the db_name in settings.json (' + config.db_name + ')')
+
+    db = Database.instance()
+    db.install()
+    db.cursor = CountingCursor(db.cursor)
+    return db
+
+
+def get_user_ids(amount):
+    """
+    Get a list of fake user ids to seed with
+    :param amount:
+    :return: list
+    """
+    return [BENCH_USER_OFFSET + i for i in range(amount)]
+
+
+def insert_rows(db, table, rows):
+    """
+    Insert a list of rows (dictionaries with the same keys) in chunks of multi-row inserts
+    :param db:
+    :param table:
+    :param rows:
+    :return:
+    """
+    if not rows:
+        return
+
+    fields = list(rows[0].keys())
+    sql = 'INSERT INTO ' + table + ' (' + ', '.join(fields) + ') VALUES (' + ', '.join(['%s'] * len(fields)) + ')'
+
+    for i in range(0, len(rows), INSERT_CHUNK):
+        chunk = rows[i:i + INSERT_CHUNK]
+        db.cursor.executemany(sql, [[row[field] for field in fields] for row in chunk])
+
+
+def delete_in(db, table, field, values):
+    """
+    Delete rows where a field matches any of a (possibly very long) list of values, in chunks
+    :param db:
+    :param table:
+    :param field:
+    :param values:
+    :return:
+    """
+    values = list(values)
+    for i in range(0, len(values), INSERT_CHUNK):
+        db.delete(table, {field: values[i:i + INSERT_CHUNK]})
+
+
+def report(title, rows):
+    """
+    Print out a table of results
+    :param title:
+    :param rows: list of (label, value) tuples
+    :return:
+    """
+    width = max(len(label) for label, value in rows)
+    lib.out('[BENCH] ' + title)
+    for label, value in rows:
+        if isinstance(value, float):
+            value = '{:,.3f}'.format(value)
+        elif isinstance(value, int):
+            value = '{:,}'.format(value)
+        print('    ' + label.ljust(width) + '  ' + str(value))
+
+
+class Timer:
+    """
+    Context manager to time a block of code
+    """
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+        return self
+
+    def __exit__(self, *args):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,62 @@
+"""
+Microbenchmarks of the helper functions in lib.py which are called on every command, or for every goal reset.
+
+These don't touch the database, so unlike the other benchmarks they don't need --confirm-db.
+
+Usage (from the repository root):
+    python -m benchmarks.lib_helpers --number 100000
+"""
+import argparse, lib, pytz, timeit
+from benchmarks import helpers
+
+TIMEZONES = ['Europe/London', 'europe/london', 'AMERICA/NEW_YORK', 'Australia/Sydney', 'Not/A_Timezone', '']
+
+
+def is_valid_timezone_scan(timezone):
+    """
+    The original version of lib.is_valid_timezone, which scanned a lowercased copy of every timezone, for comparison
+    :param timezone:
+    :return: bool
+    """
+    if not timezone:
+        return False
+
+    timezones = [x.lower() for x in pytz.all_timezones]
+    return timezone.lower() in timezones
+
+
+def get_benchmarks():
+    """
+    Get the functions to time, each of which runs through all of the test timezones once
+    :return: list of (label, function) tuples
+    """
+    return [
+        ('is_valid_timezone (list scan)', lambda: [is_valid_timezone_scan(tz) for tz in TIMEZONES]),
+        ('is_valid_timezone', lambda: [lib.is_valid_timezone(tz) for tz in TIMEZONES]),
+        ('get_timezone', lambda: [lib.get_timezone(tz) for tz in TIMEZONES]),
+        ('pytz.timezone', lambda: [pytz.timezone(tz) for tz in TIMEZONES if lib.is_valid_timezone(tz)]),
+        ('get_midnight_utc', lambda: [lib.get_midnight_utc(tz, 'weekly') for tz in TIMEZONES if lib.is_valid_timezone(tz)]),
+        ('get_previous_period', lambda: [lib.get_previous_period(tz, 'monthly') for tz in TIMEZONES if lib.is_valid_timezone(tz)]),
+        ('is_number', lambda: [lib.is_number(value) for value in ['500', 'abc', None, '12.5', '-3', '1000000']]),
+        ('secs_to_days', lambda: [lib.secs_to_days(seconds) for seconds in [59, 3600, 86400, 90061, 604800, 31536000]]),
+    ]
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark the helper functions in lib.py')
+    parser.add_argument('--number', type=int, default=10000, help='Number of times to run each benchmark, per repeat')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of repeats. The fastest is reported.')
+    args = parser.parse_args()
+
+    # Report the time for one run of each benchmark, which is one call for each of its test values.
+    results = []
+    for label, function in get_benchmarks():
+        best = min(timeit.repeat(function, number=args.number, repeat=args.repeat))
+        results.append((label + ' (us per run)', best / args.number * 1000000))
+
+    helpers.report('lib.py helpers, ' + '{:,}'.format(args.number) + ' runs', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Offline simulation of the scheduled task loop.
+
+Seeds due tasks (sprint ends and event starts, with their sprints and events), reminders and user goals, then runs
+Task.execute_all against a fake bot, reporting the throughput of each pass.
+
+Usage (from the repository root):
+    python -m benchmarks.scheduler --confirm-db writerbot_dev --tasks 10000 --reminders 10000 --goals 10000
+"""
+import asyncio, time
+from benchmarks import helpers
+from structures.metrics import Metrics
+from structures.registry import EventRegistry, SprintRegistry
+from structures.task import Task
+
+# Import the structures so they register their task handlers.
+from structures.event import Event
+from structures.goal import Goal
+from structures.reminder import Reminder
+from structures.sprint import Sprint
+
+
+def seed(db, tasks, reminders, goals):
+    """
+    Seed the rows for the benchmark, all due to be processed now
+    :param db:
+    :param tasks:
+    :param reminders:
+    :param goals:
+    :return: dict The seeded ids, for cleaning up afterwards
+    """
+    now = int(time.time())
+    users = helpers.get_user_ids(max(reminders, goals, 1))
+
+    # Half of the tasks end sprints, the other half start events.
+    sprints = tasks // 2
+    events = tasks - sprints
+
+    helpers.insert_rows(db, 'sprints', [{'guild': helpers.BENCH_GUILD, 'channel': helpers.BENCH_CHANNEL, 'start': now - 600, 'end': now - 5, 'end_reference': now - 5, 'length': 10, 'createdby': users[0], 'created': now - 600} for i in range(sprints)])
+    sprint_ids = [row['id'] for row in db.get_all('sprints', {'guild': helpers.BENCH_GUILD}, ['id'])]
+    helpers.insert_rows(db, 'sprint_users', [{'sprint': id, 'user': users[i % len(users)], 'timejoined': now - 600} for i, id in enumerate(sprint_ids)])
+    helpers.insert_rows(db, 'tasks', [{'time': now - 5, 'type': 'end', 'object': 'sprint', 'objectid': id} for id in sprint_ids])
+
+    helpers.insert_rows(db, 'events', [{'guild': helpers.BENCH_GUILD, 'channel': helpers.BENCH_CHANNEL, 'title': 'Benchmark ' + str(i)} for i in range(events)])
+    event_ids = [row['id'] for row in db.get_all('events', {'guild': helpers.BENCH_GUILD}, ['id'])]
+    helpers.insert_rows(db, 'tasks', [{'time': now - 5, 'type': 'start', 'object': 'event', 'objectid': id} for id in event_ids])
+
+    helpers.insert_rows(db, 'reminders', [{'user': users[i % len(users)], 'guild': helpers.BENCH_GUILD, 'time': now - 5, 'channel': helpers.BENCH_CHANNEL, 'message': 'Benchmark'} for i in range(reminders)])
+    helpers.insert_rows(db, 'user_goals', [{'user': users[i % len(users)], 'type': 'daily', 'goal': 500, 'current': 0, 'completed': 0, 'reset': now - 5} for i in range(goals)])
+
+    # Make sure the recurring goal and reminder tasks are due, in the same way the bot creates them on boot.
+    db.delete('tasks', {'object': 'goal', 'type': 'reset'})
+    db.insert('tasks', {'object': 'goal', 'time': 0, 'type': 'reset', 'recurring': 1, 'runeveryseconds': 900})
+    db.delete('tasks', {'object': 'reminder', 'type': 'send'})
+    db.insert('tasks', {'object': 'reminder', 'time': 0, 'type': 'send', 'recurring': 1, 'runeveryseconds': 30})
+
+    # The sprints and events were inserted directly, so load them into the registries the same way the bot does on boot.
+    SprintRegistry.instance().rebuild()
+    EventRegistry.instance().rebuild()
+
+    return {'sprints': sprint_ids, 'events': event_ids, 'users': users}
+
+
+def cleanup(db, seeded):
+    """
+    Delete everything which was seeded, or created by running the tasks
+    :param db:
+    :param seeded:
+    :return:
+    """
+    for object, ids in (('sprint', seeded['sprints']), ('event', seeded['events'])):
+        for i in range(0, len(ids), helpers.INSERT_CHUNK):
+            db.delete('tasks', {'object': object, 'objectid': ids[i:i + helpers.INSERT_CHUNK]})
+
+    helpers.delete_in(db, 'sprint_users', 'sprint', seeded['sprints'])
+    db.delete('sprints', {'guild': helpers.BENCH_GUILD})
+    db.delete('events', {'guild': helpers.BENCH_GUILD})
+    db.delete('reminders', {'guild': helpers.BENCH_GUILD})
+    helpers.delete_in(db, 'user_goals', 'user', seeded['users'])
+    helpers.delete_in(db, 'user_goals_history', 'user', seeded['users'])
+
+
+async def run(db, bot, ticks):
+    """
+    Run the scheduler passes and measure each one
+    :param db:
+    :param bot:
+    :param ticks:
+    :return: list
+    """
+    metrics = Metrics.instance()
+    results = []
+
+    for tick in range(ticks):
+
+        tasks = metrics.get_ticks()['tasks']
+        queries = db.cursor.queries
+        messages = bot.channel.sent
+
+        with helpers.Timer() as timer:
+            await Task.execute_all(bot)
+
+        tasks = metrics.get_ticks()['tasks'] - tasks
+        queries = db.cursor.queries - queries
+        results.append({
+            'tick': tick + 1,
+            'tasks': tasks,
+            'queries': queries,
+            'messages': bot.channel.sent - messages,
+            'duration': timer.elapsed,
+        })
+
+    return results
+
+
+def main():
+
+    parser = helpers.get_parser('Benchmark the scheduled task loop')
+    parser.add_argument('--tasks', type=int, default=10000, help='Number of sprint/event tasks to seed')
+    parser.add_argument('--reminders', type=int, default=10000, help='Number of due reminders to seed')
+    parser.add_argument('--goals', type=int, default=10000, help='Number of user goals due a reset to seed')
+    parser.add_argument('--ticks', type=int, default=1, help='Number of scheduler passes to run')
+    args = parser.parse_args()
+
+    db = helpers.connect(args)
+    bot = helpers.FakeBot()
+
+    with helpers.Timer() as timer:
+        seeded = seed(db, args.tasks, args.reminders, args.goals)
+    helpers.report('Seeded', [('tasks', args.tasks), ('reminders', args.reminders), ('goals', args.goals), ('seconds', timer.elapsed)])
+
+    try:
+        for result in asyncio.run(run(db, bot, args.ticks)):
+            helpers.report('Tick ' + str(result['tick']), [
+                ('tick duration (s)', result['duration']),
+                ('tasks', result['tasks']),
+                ('tasks per second', result['tasks'] / result['duration'] if result['duration'] > 0 else 0.0),
+                ('queries', result['queries']),
+                ('queries per task', result['queries'] / result['tasks'] if result['tasks'] > 0 else 0.0),
+                ('messages sent', result['messages']),
+            ])
+
+        for key, stats in Metrics.instance().get_tasks().items():
+            helpers.report(key, list(stats.items()))
+
+    finally:
+        if not args.keep:
+            cleanup(db, seeded)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,18 @@ from discord.ext import commands
 from discord.ext.commands import AutoShardedBot
 from structures.db import *
 from structures.guild import Guild
+from structures.leaderboard import Leaderboard
+from structures.metrics import Metrics
+from structures.registry import EventRegistry, SprintRegistry
 from structures.task import Task
 from structures.user import User
 
+# These structures register the handlers for their scheduled tasks when they are imported.
+from structures.event import Event
+from structures.goal import Goal
+from structures.reminder import Reminder
+from structures.sprint import Sprint
+
 class WriterBot(AutoShardedBot):
 
     COMMAND_GROUPS = ['util', 'fun', 'writing']
@@ -30,6 +39,9 @@ class WriterBot(AutoShardedBot):
         if not self.is_ready():
             return
 
+        # Anything loaded about a user while running the command is kept until it finishes.
+        User.begin_identity_map()
+
         await self.process_commands(message)
 
     async def on_ready(self):
@@ -49,6 +61,30 @@ class WriterBot(AutoShardedBot):
         self.scheduled_tasks.start()
         self.cleanup_tasks.start()
 
+    async def on_member_join(self, member):
+        """
+        Method run when a user joins a guild the bot is in.
+        :param member:
+        :return:
+        """
+        Leaderboard.instance().add_member(member.guild.id, member.id)
+
+    async def on_member_remove(self, member):
+        """
+        Method run when a user leaves a guild the bot is in.
+        :param member:
+        :return:
+        """
+        Leaderboard.instance().remove_member(member.guild.id, member.id)
+
+    async def on_guild_remove(self, guild):
+        """
+        Method run when the bot leaves a guild.
+        :param guild:
+        :return:
+        """
+        Leaderboard.instance().remove_guild(guild.id)
+
     async def on_command_error(self, context, error):
         """
         Method to run if there is an exception thrown by a command
@@ -64,17 +100,17 @@ class WriterBot(AutoShardedBot):
         elif isinstance(error, commands.errors.NoPrivateMessage):
             return await context.send('Commands cannot be used in Private Messages.')
         elif isinstance(error, commands.errors.MissingPermissions):
-            user = User(context.message.author.id, context.guild.id, context)
+            user = User.get(context.message.author.id, context.guild.id, context)
             return await context.send(user.get_mention() + ', ' + str(error))
         elif isinstance(error, commands.errors.CommandInvokeError):
             code = lib.error('CommandInvokeError in command `{}`: {}'.format(context.command, str(error)))
             lib.error(traceback.format_exception(type(error), error, error.__traceback__), code)
-            user = User(context.message.author.id, context.guild.id, context)
+            user = User.get(context.message.author.id, context.guild.id, context)
             return await context.send(lib.get_string('err:commandinvoke', user.get_guild()).format(code))
         else:
             code = lib.error('Exception in command `{}`: {}'.format(context.command, str(error)))
             lib.error( traceback.format_exception(type(error), error, error.__traceback__), code )
-            user = User(context.message.author.id, context.guild.id, context)
+            user = User.get(context.message.author.id, context.guild.id, context)
             return await context.send(lib.get_string('err:unknown', user.get_guild()).format(code))
 
     def load_commands(self):
@@ -165,6 +201,14 @@ class WriterBot(AutoShardedBot):
         # Restart all tasks which are marked as processing, in case the bot dropped out during the process.
         db.update('tasks', {'processing': 0})
 
+        # Load the active sprints into memory.
+        sprints = SprintRegistry.instance().rebuild()
+        lib.out('[SPRINT] ' + str(sprints) + ' active sprints loaded')
+
+        # Load the current events into memory.
+        events = EventRegistry.instance().rebuild()
+        lib.out('[EVENT] ' + str(events) + ' current events loaded')
+
         # Remove the default 'help' command.
         self.remove_command('help')
 
@@ -220,6 +264,12 @@ class WriterBot(AutoShardedBot):
         except Exception as e:
             lib.out('Exception: ' + str(e))
 
+        # Write out the latest scheduler metrics, so they can be checked without going through the bot.
+        try:
+            Metrics.instance().save()
+        except OSError as e:
+            lib.out('Could not save metrics: ' + str(e))
+
     @tasks.loop(hours=CLEANUP_TASK_LOOP)
     async def cleanup_tasks(self):
         """
@@ -231,5 +281,10 @@ class WriterBot(AutoShardedBot):
         lib.debug('['+str(self.shard_id)+'] Running task cleanup...')
 
         hour_ago = int(time.time()) - (60*60)
-        db.execute('DELETE FROM tasks WHERE processing = 1 AND time < %s AND time <> 0', [hour_ago])
+        deleted = db.execute('DELETE FROM tasks WHERE processing = 1 AND time < %s AND time <> 0', [hour_ago])
+
+        # Keep track of how many tasks got stuck, as that tells us if tasks are regularly taking longer than they should.
+        Metrics.instance().increment('tasks_cleaned', deleted)
+        if deleted > 0:
+            lib.out('[TASK] Cleaned up ' + str(deleted) + ' stuck task(s)')
 
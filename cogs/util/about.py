@@ -1,13 +1,36 @@
 import os, json, lib, discord, datetime, time
-from discord.ext import commands
+from discord.ext import commands, tasks
 from structures.guild import Guild
-from structures.db import Database
+from structures.registry import SprintRegistry
 
 class About(commands.Cog):
 
+    STATS_REFRESH_LOOP = 10.0 # Minutes
+
     def __init__(self, bot):
         self.bot = bot
-        self.__db = Database.instance()
+
+        # The git info can't change while the bot is running, so only get it once.
+        self._git = self.get_git_info()
+
+        # The member count is worked out in the background, rather than every time the command is run.
+        self._members = None
+        self.refresh_stats.start()
+
+    def cog_unload(self):
+        self.refresh_stats.cancel()
+
+    @tasks.loop(minutes=STATS_REFRESH_LOOP)
+    async def refresh_stats(self):
+        """
+        Recount the members of every server the bot is in
+        :return:
+        """
+        self._members = self.count_members(self.bot.guilds)
+
+    @refresh_stats.before_loop
+    async def before_refresh_stats(self):
+        await self.bot.wait_until_ready()
 
     @commands.command(aliases=['info'])
     @commands.guild_only()
@@ -25,7 +48,8 @@ class About(commands.Cog):
         uptime = int(round(now - self.bot.start_time))
         guild_id = context.guild.id
         config = self.bot.config
-        sprints = self.__db.get('sprints', {'completed': 0}, ['COUNT(id) as cnt'])['cnt']
+        sprints = SprintRegistry.instance().count()
+        members = self._members if self._members is not None else lib.get_string('na', guild_id)
 
         # Begin the embedded message
         embed = discord.Embed(title=lib.get_string('info:bot', guild_id), color=3447003)
@@ -36,7 +60,7 @@ class About(commands.Cog):
         # Statistics
         stats = []
         stats.append('• ' + lib.get_string('info:servers', guild_id) + ': ' + format(len(self.bot.guilds)))
-        stats.append('• ' + lib.get_string('info:members', guild_id) + ': ' + format(self.count_members(self.bot.guilds)))
+        stats.append('• ' + lib.get_string('info:members', guild_id) + ': ' + format(members))
         stats.append('• ' + lib.get_string('info:sprints', guild_id) + ': ' + str(sprints))
         stats.append('• ' + lib.get_string('info:helpserver', guild_id) + ': ' + config.help_server)
         stats = '\n'.join(stats)
@@ -44,9 +68,7 @@ class About(commands.Cog):
         embed.add_field(name=lib.get_string('info:generalstats', guild_id), value=stats, inline=False)
 
         # Developer Info
-        git = {}
-        git['branch'] = os.popen(r'git rev-parse --abbrev-ref HEAD').read().strip()
-        git['rev'] =  os.popen(r'git log --pretty=format:"%h | %ad | %s" --date=short -n 1').read().strip()
+        git = self._git
 
         dev = []
         dev.append(lib.get_string('info:dev:branch', guild_id) + ': ' + format(git['branch']))
@@ -61,6 +83,16 @@ class About(commands.Cog):
         await context.send(embed=embed)
 
 
+    def get_git_info(self):
+        """
+        Get the current branch and latest commit of the bot's code
+        @return dict
+        """
+        git = {}
+        git['branch'] = os.popen(r'git rev-parse --abbrev-ref HEAD').read().strip()
+        git['rev'] =  os.popen(r'git log --pretty=format:"%h | %ad | %s" --date=short -n 1').read().strip()
+        return git
+
     def count_members(self, guilds):
         """
         Count all the members in every server this bot is in.
@@ -69,7 +101,7 @@ class About(commands.Cog):
         """
         total = 0
         for guild in guilds:
-            total += len(guild.members)
+            total += guild.member_count or 0
         return total
 
 
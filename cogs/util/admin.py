@@ -1,5 +1,6 @@
 import discord, lib
 from discord.ext import commands
+from structures.metrics import Metrics
 from structures.user import User
 from structures.wrapper import CommandWrapper
 
@@ -7,7 +8,7 @@ class Admin(commands.Cog, CommandWrapper):
 
     def __init__(self, bot):
         self.bot = bot
-        self._supported_commands = ['status']
+        self._supported_commands = ['status', 'metrics']
         self._arguments = [
             {
                 'key': 'cmd',
@@ -28,7 +29,7 @@ class Admin(commands.Cog, CommandWrapper):
         :return:
         """
 
-        user = User(context.message.author.id, context.guild.id, context=context, bot=self.bot)
+        user = User.get(context.message.author.id, context.guild.id, context=context, bot=self.bot)
         if not user.is_owner():
             raise commands.errors.MissingPermissions(['Bot owner'])
 
@@ -42,6 +43,8 @@ class Admin(commands.Cog, CommandWrapper):
 
         if cmd == 'status':
             return await self.run_status(context, opts)
+        elif cmd == 'metrics':
+            return await self.run_metrics(context)
 
 
     async def run_status(self, context, opts):
@@ -53,5 +56,36 @@ class Admin(commands.Cog, CommandWrapper):
         status = " ".join(opts[0:])
         return await self.bot.change_presence(activity=discord.Game(status))
 
+    async def run_metrics(self, context):
+        """
+        Display the scheduler metrics recorded since the bot started
+        :param context:
+        :return:
+        """
+        metrics = Metrics.instance()
+        ticks = metrics.get_ticks()
+        tasks = metrics.get_tasks()
+
+        if ticks['count'] == 0 and not tasks:
+            return await context.send(lib.get_string('admin:metrics:none', context.guild.id))
+
+        # Build a table of the task stats, with times in seconds.
+        output = '```\n'
+        output += 'ticks={} tasks={} pending_max={} tick_avg={}s tick_max={}s\n\n'.format(ticks['count'], ticks['tasks'], ticks['pending_max'], ticks['duration_avg'], ticks['duration_max'])
+        output += '{:<20}{:>8}{:>8}{:>10}{:>10}{:>10}{:>10}\n'.format('task', 'runs', 'fails', 'lag_avg', 'lag_max', 'run_avg', 'run_max')
+        for key, stats in tasks.items():
+            lag_avg = stats['lag_avg'] if stats['lag_avg'] is not None else '-'
+            output += '{:<20}{:>8}{:>8}{:>10}{:>10}{:>10}{:>10}\n'.format(key, stats['runs'], stats['failures'], lag_avg, stats['lag_max'], stats['duration_avg'], stats['duration_max'])
+
+        output += '\ntasks_cleaned={}\n'.format(metrics.get_counter('tasks_cleaned'))
+
+        # Then the hit rates of the caches.
+        for name, stats in metrics.get_caches().items():
+            hit_rate = stats['hit_rate'] if stats['hit_rate'] is not None else '-'
+            output += 'cache:{} hits={} misses={} evictions={} hit_rate={}\n'.format(name, stats['hits'], stats['misses'], stats['evictions'], hit_rate)
+        output += '```'
+
+        return await context.send(output)
+
 def setup(bot):
     bot.add_cog(Admin(bot))
\ No newline at end of file
@@ -16,7 +16,7 @@ class Help(commands.Cog, CommandWrapper):
         Help command and subcommands
         """
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         command = command.lower()
 
@@ -142,6 +142,7 @@ class Help(commands.Cog, CommandWrapper):
             goal_embed.add_field(name='`goal time yearly`', value=lib.get_string('help:goalTimeSub', user.get_guild()), inline=True)
             goal_embed.add_field(name='`goal history monthly`', value=lib.get_string('help:goalHistorySub', user.get_guild()), inline=True)
             goal_embed.add_field(name='`goal update yearly 12350`', value=lib.get_string('help:goalUpdateSub', user.get_guild()), inline=True)
+            goal_embed.add_field(name='`goal activity`', value=lib.get_string('help:goalActivitySub', user.get_guild()), inline=True)
 
             return await context.send(embed=goal_embed)
 
@@ -161,6 +162,7 @@ class Help(commands.Cog, CommandWrapper):
         elif command == 'profile':
             profile_embed=discord.Embed(title='Help with `profile` command.', color=3897943)
             profile_embed.add_field(name='`profile`', value=lib.get_string('help:profileSub', user.get_guild()), inline=True)
+            profile_embed.add_field(name='`profile activity`', value=lib.get_string('help:profileActivitySub', user.get_guild()), inline=True)
 
             return await context.send(embed=profile_embed)
 
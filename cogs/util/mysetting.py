@@ -41,7 +41,7 @@ class MySetting(commands.Cog, CommandWrapper):
         if not Guild(context.guild).is_command_enabled('mysetting'):
             return await context.send(lib.get_string('err:disabled', context.guild.id))
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # If we want to list the setting, do that instead.
         if setting is not None and setting.lower() == 'list':
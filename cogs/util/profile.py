@@ -13,15 +13,23 @@ class Profile(commands.Cog, CommandWrapper):
 
     @commands.command(name="profile")
     @commands.guild_only()
-    async def profile(self, context):
+    async def profile(self, context, option=None):
         """
         Displays your Writer-Bot profile information and statistics.
+
+        Examples:
+            !profile - Displays your profile
+            !profile activity - Displays how many words you have written each day recently
         """
 
         if not Guild(context.guild).is_command_enabled('profile'):
             return await context.send(lib.get_string('err:disabled', context.guild.id))
 
-        user = User(context.message.author.id, context.guild.id, context)
+        if option == 'activity':
+            return await self.run_activity(context)
+
+        user = User.get(context.message.author.id, context.guild.id, context)
+        user.load_profile()
         goals = {
             'daily': user.get_goal_progress('daily')
         }
@@ -57,6 +65,31 @@ class Profile(commands.Cog, CommandWrapper):
         # Send the message
         await context.send(embed=embed)
 
+    async def run_activity(self, context):
+        """
+        Display the words the user has written each day recently, with some totals
+        :param context:
+        :return:
+        """
+        user = User.get(context.message.author.id, context.guild.id, context)
+        days = user.get_daily_words(User.ACTIVITY_DAYS)
+        words = [amount for day, amount in days]
+
+        if not any(words):
+            return await context.send(user.get_mention() + ', ' + lib.get_string('profile:activity:none', user.get_guild()).format(User.ACTIVITY_DAYS))
+
+        # Chart the last 2 weeks, with the totals over the whole period underneath.
+        description = '\n'.join(lib.format_daily_words(days[-14:]))
+        best_day, best_words = max(days, key=lambda day: day[1])
+
+        embed = discord.Embed(title=lib.get_string('profile:activity', user.get_guild()).format(User.ACTIVITY_DAYS), description=description, color=3066993)
+        embed.add_field(name=lib.get_string('profile:activity:week', user.get_guild()), value=sum(words[-7:]), inline=True)
+        embed.add_field(name=lib.get_string('profile:activity:total', user.get_guild()).format(User.ACTIVITY_DAYS), value=sum(words), inline=True)
+        embed.add_field(name=lib.get_string('profile:activity:average', user.get_guild()), value=round(sum(words) / len(words)), inline=True)
+        embed.add_field(name=lib.get_string('profile:activity:best', user.get_guild()), value=str(best_words) + ' (' + best_day.strftime('%d %b') + ')', inline=True)
+
+        await context.send(embed=embed)
+
 
 def setup(bot):
     bot.add_cog(Profile(bot))
\ No newline at end of file
@@ -1,4 +1,4 @@
-import discord, lib, re, pytz, time
+import discord, lib, re, time
 from datetime import datetime, timezone, timedelta
 from discord.ext import commands
 from structures.reminder import Reminder
@@ -39,7 +39,7 @@ class Remind(commands.Cog, CommandWrapper):
         if not Guild(context.guild).is_command_enabled('remind'):
             return await context.send(lib.get_string('err:disabled', context.guild.id))
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Does the user have a timezone setup? If not, can't do anything.
         if not lib.is_valid_timezone(user.get_setting('timezone')):
@@ -108,7 +108,7 @@ class Remind(commands.Cog, CommandWrapper):
             # Now convert the time to an int.
             requested_time = int(requested_time)
 
-            timezone = pytz.timezone(user.get_setting('timezone'))
+            timezone = lib.get_timezone(user.get_setting('timezone'))
             timezone_date = datetime.now(timezone).strftime('%d-%m-%Y') if requested_date is None else requested_date
             timezone_time = int(datetime.now(timezone).strftime('%H%M'))
 
@@ -158,7 +158,7 @@ class Remind(commands.Cog, CommandWrapper):
             # Now convert the time to an int.
             requested_time = int(requested_time)
 
-            timezone = pytz.timezone(user.get_setting('timezone'))
+            timezone = lib.get_timezone(user.get_setting('timezone'))
             timezone_date = datetime.now(timezone).strftime('%d-%m-%Y')
             timezone_time = int(datetime.now(timezone).strftime('%H%M'))
 
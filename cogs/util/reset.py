@@ -35,12 +35,12 @@ class Reset(commands.Cog, CommandWrapper):
             !reset pb: Resets your wpm personal best
             !reset wc: Resets your total word count
             !reset xp: Resets your xp/level to 0
-            !reset all: Resets your xp/levels, stats, records, goals and challenges
+            !reset all: Resets your xp/levels, stats, records, goals, challenges, projects, sprint history and daily word counts
         """
         if not Guild(context.guild).is_command_enabled('reset'):
             return await context.send(lib.get_string('err:disabled', context.guild.id))
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Check the arguments are valid
         args = await self.check_arguments(context, what=what, confirm=confirm)
@@ -57,7 +57,7 @@ class Reset(commands.Cog, CommandWrapper):
 
         # Personal Best
         if what == 'pb':
-            user.update_record('wpm', 0)
+            user.reset_pb()
             output = lib.get_string('reset:pb', user.get_guild())
 
         elif what == 'wc':
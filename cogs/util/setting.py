@@ -39,7 +39,7 @@ class Setting(commands.Cog, CommandWrapper):
             !setting sprint_delay_end 5 - Set the timer delay between the sprint finishing and the final word counts being tallied. Max time: 15 mins. Default: 2 mins.
             !setting list - Displays a list of all the custom server settings
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         guild = Guild(context.guild)
 
         # If we want to list the setting, do that instead.
@@ -27,13 +27,33 @@ class XP(commands.Cog):
 
         if who == 'top':
 
+            guild = Guild(context.guild)
+            users = guild.get_top_xp()
+
+            # Build the rows of the leaderboard.
+            rows = []
+            for position, user in enumerate(users, start=1):
+                xp = user.get_xp()
+                rows.append(lib.get_string('xp:leaderboard:row', guild_id).format(position, user.get_name(), xp['lvl'], xp['xp']))
+
+            leaderboard = '\n'.join(rows) if rows else lib.get_string('xp:leaderboard:empty', guild_id)
+
+            # Then show the user where they are on it.
+            rank = guild.get_xp_rank(user_id)
+            if rank is not None:
+                footer = lib.get_string('xp:leaderboard:rank', guild_id).format(rank, guild.count_xp_users())
+            else:
+                footer = lib.get_string('xp:noxp', guild_id)
+
             title = context.guild.name + ' - ' + lib.get_string('xp:leaderboard', guild_id)
             embed = discord.Embed(title=title, color=discord.Color.red(), description=None)
-            embed.add_field(name=lib.get_string('xp:leaderboard', guild_id), value='Leaderboard temporarily disabled until a fix can be implemented', inline=False)
+            embed.add_field(name=lib.get_string('xp:leaderboard', guild_id), value=leaderboard, inline=False)
+            embed.set_footer(text=footer)
             return await context.send(embed=embed)
 
         else:
-            user = User(user_id, guild_id)
+            user = User.get(user_id, guild_id)
+            user.load_profile()
             xp = user.get_xp()
 
             # Either display a message saying they have no XP, or display the XP bar for the user
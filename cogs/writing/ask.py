@@ -35,7 +35,7 @@ class Ask(commands.Cog, CommandWrapper):
         if not Guild(context.guild).is_command_enabled('ask'):
             return await context.send(lib.get_string('err:disabled', context.guild.id))
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Check the arguments were all supplied and get a dict list of them and their values, after any prompts
         args = await self.check_arguments(context, type=type)
@@ -94,7 +94,7 @@ class Challenge(commands.Cog, CommandWrapper):
 
     async def run_complete(self, context):
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Do they have an active challenge to mark as complete?
         challenge = user.get_challenge()
@@ -119,7 +119,7 @@ class Challenge(commands.Cog, CommandWrapper):
 
     async def run_cancel(self, context):
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         challenge = user.get_challenge()
 
         if challenge:
@@ -132,7 +132,7 @@ class Challenge(commands.Cog, CommandWrapper):
 
     async def run_challenge(self, context, flag, flag2=None):
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         challenge = user.get_challenge()
         if challenge:
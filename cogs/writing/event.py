@@ -96,7 +96,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # First try and get the event as if its running
         event = Event.get_by_guild(user.get_guild())
@@ -120,7 +120,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         event = Event.get_by_guild(user.get_guild())
 
         # Do they have the permissions to rename an event?
@@ -146,7 +146,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         event = Event.get_by_guild(user.get_guild())
 
         # Do they have the permissions to rename an event?
@@ -161,16 +161,15 @@ class EventCommand(commands.Cog, CommandWrapper):
             return await context.send(user.get_mention() + ', ' + lib.get_string('event:err:alreadyrunning', user.get_guild()))
 
         # Do they have a timezone set in their user settings?
-        user_timezone = user.get_setting('timezone')
-        if user_timezone is None:
+        timezone = lib.get_timezone(user.get_setting('timezone'))
+        if timezone is None:
             return await context.send(user.get_mention() + ', ' + lib.get_string('event:err:timezonenotset', user.get_guild()))
 
-        timezone = pytz.timezone(user_timezone)
         time = datetime.now(timezone).strftime('%H:%M:%S')
         offset = datetime.now(timezone).strftime('%z')
 
         # Print the pre-schedule information to check their timezone is correct.
-        await context.send(user.get_mention() + ', ' + lib.get_string('event:preschedule', user.get_guild()).format(user_timezone, time, offset))
+        await context.send(user.get_mention() + ', ' + lib.get_string('event:preschedule', user.get_guild()).format(timezone.zone, time, offset))
 
         # We now have various stages to go through, so we loop through the stages, ask the question and store the user input as the answer.
         answers = []
@@ -392,7 +391,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         event = Event.get_by_guild(user.get_guild())
         config = lib.get('./settings.json')
 
@@ -403,18 +402,14 @@ class EventCommand(commands.Cog, CommandWrapper):
         # Work out which timezone to use when displaying the start and end dates.
         start_date = lib.get_string('na', user.get_guild())
         end_date = lib.get_string('na', user.get_guild())
-        user_timezone = user.get_setting('timezone')
-        if not user_timezone:
-            user_timezone = 'UTC'
-
-        timezone = pytz.timezone(user_timezone)
+        timezone = lib.get_timezone(user.get_setting('timezone')) or pytz.utc
 
         # Is it scheduled with start and end dates?
         if event.is_scheduled():
             start = datetime.fromtimestamp(event.get_start_time())
             end = datetime.fromtimestamp(event.get_end_time())
-            start_date = start.astimezone(timezone).strftime('%d-%m-%Y %H:%M:%S') + ' ('+user_timezone+')'
-            end_date = end.astimezone(timezone).strftime('%d-%m-%Y %H:%M:%S') + ' ('+user_timezone+')'
+            start_date = start.astimezone(timezone).strftime('%d-%m-%Y %H:%M:%S') + ' ('+timezone.zone+')'
+            end_date = end.astimezone(timezone).strftime('%d-%m-%Y %H:%M:%S') + ' ('+timezone.zone+')'
 
         # Get the running status
         if event.is_running():
@@ -423,7 +418,7 @@ class EventCommand(commands.Cog, CommandWrapper):
             status = lib.get_string('event:notyetstarted', user.get_guild())
 
         # Get the number of users in the event and how many words they have written in it so far
-        writers = len(event.get_users())
+        writers = event.count_users()
         words = event.get_total_wordcount()
 
         # Get the description of the event and add to the end of the status, or just display the status if the description is empty
@@ -455,7 +450,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         event = Event.get_by_guild(user.get_guild())
 
         # Make sure the event is running
@@ -472,7 +467,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param amount:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         event = Event.get_by_guild(user.get_guild())
 
         amount = lib.is_number(amount[0])
@@ -492,7 +487,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         event = Event.get_by_guild(user.get_guild())
         now = int(time.time())
 
@@ -524,7 +519,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Do they have the permissions to end an event?
         self.check_permissions(context)
@@ -547,7 +542,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Do they have the permissions to start an event?
         self.check_permissions(context)
@@ -567,7 +562,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param opts:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Do they have the permissions to set an event option?
         self.check_permissions(context)
@@ -600,7 +595,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param opts:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Do they have the permissions to rename an event?
         self.check_permissions(context)
@@ -628,7 +623,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Do they have the permissions to delete an event?
         self.check_permissions(context)
@@ -671,7 +666,7 @@ class EventCommand(commands.Cog, CommandWrapper):
         :param opts:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Do they have the permissions to create an event?
         self.check_permissions(context)
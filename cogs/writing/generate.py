@@ -54,7 +54,7 @@ class Generate(commands.Cog, CommandWrapper):
         if not Guild(context.guild).is_command_enabled('generate'):
             return await context.send(lib.get_string('err:disabled', context.guild.id))
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # If no amount specified, use the default
         if amount is None:
@@ -35,16 +35,23 @@ class Goal(commands.Cog, CommandWrapper):
             !goal set weekly 500 - Sets your weekly goal to be 500 words per day
             !goal cancel monthly - Deletes your monthly goal
             !goal time daily - Checks how long until your daily goal resets
+            !goal history daily - Shows your daily goal history for the last 14 days
+            !goal history daily 2 - Shows the page of daily goal history before that
+            !goal activity - Shows how many words you have written each day for the last 14 days, against your daily goal
         """
         if not Guild(context.guild).is_command_enabled('goal'):
             return await context.send(lib.get_string('err:disabled', context.guild.id))
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # If no option is sent and we just do `goal` then display a table of all their goals.
         if option is None:
             return await self.run_check_all(context)
 
+        # Activity is across all their goals, so it doesn't need a type.
+        if option == 'activity':
+            return await self.run_activity(context)
+
         # Otherwise, we must specify a type.
         if type is None or type not in self.types:
             return await context.send(user.get_mention() + ', ' + lib.get_string('goal:invalidtype', user.get_guild()))
@@ -58,7 +65,7 @@ class Goal(commands.Cog, CommandWrapper):
         elif option == 'check':
             return await self.run_check(context, type)
         elif option == 'history':
-            return await self.run_history(context, type)
+            return await self.run_history(context, type, value)
         elif option == 'update':
             return await self.run_update(context, type, value)
         else:
@@ -73,7 +80,7 @@ class Goal(commands.Cog, CommandWrapper):
         @param amount:
         @return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         type_string = lib.get_string('goal:' + type, user.get_guild())
         user_goal = user.get_goal(type)
 
@@ -88,30 +95,68 @@ class Goal(commands.Cog, CommandWrapper):
         else:
             return await context.send(user.get_mention() + ', ' + lib.get_string('goal:nogoal', user.get_guild()).format(type_string, type))
 
-    async def run_history(self, context, type):
+    async def run_history(self, context, type, page=None):
         """
         Get the user's goal history, so they can look back and see how they did for previous goals
         @param context:
         @param type:
+        @param page:
         @return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         type_string = lib.get_string('goal:' + type, user.get_guild()).lower()
-        history = user.get_goal_history(type)
+        timezone = user.get_setting('timezone') or 'UTC'
+
+        # Check the page is a valid number, if they specified one
+        if page is not None:
+            page = lib.is_number(page)
+            if not page or page < 1:
+                return await context.send(user.get_mention() + ', ' + lib.get_string('err:validamount', user.get_guild()))
+        else:
+            page = 1
+
+        history, start, end = user.get_goal_history(type, page)
 
         # Build embedded response.
-        embed = discord.Embed(title=lib.get_string('goal:history', user.get_guild()).format(type_string), color=10038562)
+        description = lib.get_string('goal:history:page', user.get_guild()).format(page, lib.format_period(start, end, 'weekly', timezone))
+        if not history:
+            description += '\n' + lib.get_string('goal:history:empty', user.get_guild())
+
+        embed = discord.Embed(title=lib.get_string('goal:history', user.get_guild()).format(type_string), description=description, color=10038562)
+        embed.set_footer(text=lib.get_string('goal:history:next', user.get_guild()).format(type, page + 1))
 
         # Loop through each history record.
         for record in history:
 
-            title = record['date']
+            # Records from before the periods were stored still have their original date string. Their periods were
+            # filled in from that date at midnight UTC, as the timezone they were reset in wasn't recorded.
+            title = record['date'] or lib.format_period(record['period_start'], record['period_end'], type, timezone)
             text = str(record['result']) + '/' + str(record['goal'])
             text += ' :white_check_mark:' if record['completed'] else ''
             embed.add_field(name=title, value=text, inline=False)
 
         await context.send(embed=embed)
 
+    async def run_activity(self, context):
+        """
+        Show the words the user has written each day recently, marking the days they met their daily goal
+        @param context:
+        @return:
+        """
+        user = User.get(context.message.author.id, context.guild.id, context)
+        daily_goal = user.get_goal('daily')
+        goal = int(daily_goal['goal']) if daily_goal else None
+
+        days = user.get_daily_words(User.GOAL_HISTORY_PERIODS['daily'])
+        description = '\n'.join(lib.format_daily_words(days, goal))
+
+        embed = discord.Embed(title=lib.get_string('goal:activity', user.get_guild()).format(len(days)), description=description, color=10038562)
+        if goal:
+            met = len([words for day, words in days if words >= goal])
+            embed.set_footer(text=lib.get_string('goal:activity:met', user.get_guild()).format(met, len(days), goal))
+
+        await context.send(embed=embed)
+
     async def run_check_all(self, context):
         """
         Print a table of all the user's goals.
@@ -120,13 +165,17 @@ class Goal(commands.Cog, CommandWrapper):
         """
 
         now = int(time.time())
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
+        user.load_profile()
         embed = discord.Embed(title=lib.get_string('goals', user.get_guild()), color=10038562)
 
+        # The goals were all loaded with the profile
+        goals = user.get_goals()
+
         for type in self.types:
 
             type_string = lib.get_string('goal:'+type, user.get_guild())
-            goal = user.get_goal(type)
+            goal = goals.get(type)
             if goal is not None:
                 progress = user.get_goal_progress(type)
                 left = lib.secs_to_days(goal['reset'] - now)
@@ -148,7 +197,7 @@ class Goal(commands.Cog, CommandWrapper):
         :param type:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Get the goal of this type for this user
         goal = user.get_goal(type)
@@ -166,13 +215,13 @@ class Goal(commands.Cog, CommandWrapper):
 
     async def run_cancel(self, context, type):
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         user.delete_goal(type)
         return await context.send(user.get_mention() + ', ' + lib.get_string('goal:givenup', user.get_guild()))
 
     async def run_set(self, context, type, amount):
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Check if we can convert the amount to an int
         amount = lib.is_number(amount)
@@ -188,7 +237,8 @@ class Goal(commands.Cog, CommandWrapper):
 
     async def run_check(self, context, type):
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
+        user.load_profile()
         type_string = lib.get_string('goal:' + type, user.get_guild())
 
         user_goal = user.get_goal(type)
@@ -46,7 +46,7 @@ class Project(commands.Cog, CommandWrapper):
         if not Guild(context.guild).is_command_enabled('project'):
             return await context.send(lib.get_string('err:disabled', context.guild.id))
 
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Check the arguments were all supplied and get a dict list of them and their values, after any prompts
         args = await self.check_arguments(context, cmd=cmd)
@@ -92,7 +92,7 @@ class Project(commands.Cog, CommandWrapper):
         @param opts:
         @return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         shortname = opts[0].lower() if opts else None
         img = opts[1] if len(opts) > 1 else None
 
@@ -115,7 +115,7 @@ class Project(commands.Cog, CommandWrapper):
         @param opts:
         @return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         shortname = opts[0].lower() if opts else None
         link = opts[1] if len(opts) > 1 else None
 
@@ -138,7 +138,7 @@ class Project(commands.Cog, CommandWrapper):
         @param opts:
         @return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         shortname = opts[0].lower()
         description = " ".join(opts[1:])
 
@@ -162,7 +162,7 @@ class Project(commands.Cog, CommandWrapper):
         @param opts:
         @return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         shortname = opts[0].lower() if opts else None
         genre = opts[1].lower() if len(opts) > 1 else None
 
@@ -185,7 +185,7 @@ class Project(commands.Cog, CommandWrapper):
         @param opts:
         @return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         shortname = opts[0].lower() if opts else None
         status = opts[1].lower() if len(opts) > 1 else None
 
@@ -218,7 +218,7 @@ class Project(commands.Cog, CommandWrapper):
         @param opts:
         @return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         by = opts[0].lower() if opts else None
         filter = opts[1].lower() if len(opts) > 1 else None
@@ -265,7 +265,7 @@ class Project(commands.Cog, CommandWrapper):
         View a specific project
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Make sure the project exists.
         if not opts:
@@ -286,7 +286,7 @@ class Project(commands.Cog, CommandWrapper):
         :param opts:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         shortname = opts[0].lower()
         amount = opts[1] if len(opts) > 1 else None
@@ -312,7 +312,7 @@ class Project(commands.Cog, CommandWrapper):
         :param opts:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         original_shortname = opts[0].lower()
         new_shortname = opts[1].lower()
@@ -343,7 +343,7 @@ class Project(commands.Cog, CommandWrapper):
         :param opts:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Make sure the project exists first
         shortname = opts[0].lower()
@@ -363,7 +363,7 @@ class Project(commands.Cog, CommandWrapper):
         :param title:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Get the shortname and title out of the argument list.
         shortname = opts[0].lower()
@@ -16,10 +16,11 @@ class SprintCommand(commands.Cog, CommandWrapper):
     MAX_LENGTH = 60 # 1 hour
     MAX_DELAY = 60 * 24 # 24 hours
     WPM_CHECK = 150 # If WPM exceeds this amount, check that the user meant to submit that many words
+    HISTORY_MONTHS = 6 # Number of months to show in the sprint history
 
     def __init__(self, bot):
         self.bot = bot
-        self._supported_commands = ['start', 'for', 'time', 'cancel', 'end', 'join', 'leave', 'wc', 'declare', 'pb', 'notify', 'forget', 'project', 'status', 'in', 'purge']
+        self._supported_commands = ['start', 'for', 'time', 'cancel', 'end', 'join', 'leave', 'wc', 'declare', 'pb', 'notify', 'forget', 'project', 'status', 'in', 'purge', 'history', 'stats']
         self._arguments = [
             {
                 'key': 'cmd',
@@ -68,12 +69,14 @@ class SprintCommand(commands.Cog, CommandWrapper):
             `sprint notify` - You will be notified when someone starts a new sprint.
             `sprint forget` - You will no longer be notified when someone starts a new sprint.
             `sprint status` - Shows you your current word count on the sprint.
+            `sprint stats` - Shows how your sprints on this server compare to everyone else's, with your streaks and wpm trend.
+            `sprint history` - Shows your lifetime sprint statistics: average and best wpm, best wpm for each sprint length and words written per month.
 
         **Sprint Tips**
         If you join the sprint with a starting word count, remember to declare your total word count at the end, not just the amount of words you wrote in the sprint.
         e.g. If you joined with 1000 words, and during the sprint you wrote another 500 words, the final word count you should declare would be 1500
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         if not Guild(context.guild).is_command_enabled('sprint'):
             return await context.send(lib.get_string('err:disabled', context.guild.id))
@@ -183,13 +186,94 @@ class SprintCommand(commands.Cog, CommandWrapper):
         elif cmd == 'purge':
             return await self.run_purge(context)
 
+        elif cmd == 'history':
+            return await self.run_history(context)
+
+        elif cmd == 'stats':
+            return await self.run_stats(context)
+
+    async def run_stats(self, context):
+        """
+        Display the user's sprint statistics on this server, compared to the server's sprint history
+        @param context:
+        @return:
+        """
+        # NumPy is only imported here, when it's needed, so it isn't loaded when the bot boots.
+        from structures.analytics import SprintAnalytics
+
+        user = User.get(context.message.author.id, context.guild.id, context)
+        guild_id = user.get_guild()
+
+        server = await SprintAnalytics.load(guild=guild_id)
+        mine = server.filter_user(user.get_id())
+
+        if mine.count() == 0:
+            return await context.send(user.get_mention() + ', ' + lib.get_string('sprint:stats:none', guild_id))
+
+        average = mine.get_average_wpm()
+        current, longest = mine.get_streaks()
+        trend = mine.get_trend()
+        quartiles = server.get_quartiles()
+
+        title = context.guild.name + ' - ' + lib.get_string('sprint:stats', guild_id)
+        embed = discord.Embed(title=title, color=discord.Color.blue(), description=user.get_mention())
+        embed.add_field(name=lib.get_string('sprint:stats:sprints', guild_id), value=lib.get_string('sprint:stats:sprints:value', guild_id).format(mine.count(), server.count()), inline=False)
+        embed.add_field(name=lib.get_string('sprint:stats:wpm', guild_id), value=lib.get_string('sprint:stats:wpm:value', guild_id).format(average, mine.get_best_wpm()), inline=False)
+        embed.add_field(name=lib.get_string('sprint:stats:percentile', guild_id), value=lib.get_string('sprint:stats:percentile:value', guild_id).format(server.get_percentile(average)), inline=False)
+        embed.add_field(name=lib.get_string('sprint:stats:streak', guild_id), value=lib.get_string('sprint:stats:streak:value', guild_id).format(current, longest), inline=False)
+
+        if trend is not None:
+            trend = lib.get_string('sprint:stats:trend:value', guild_id).format(trend)
+        else:
+            trend = lib.get_string('sprint:stats:trend:none', guild_id)
+        embed.add_field(name=lib.get_string('sprint:stats:trend', guild_id), value=trend, inline=False)
+
+        embed.add_field(name=lib.get_string('sprint:stats:server', guild_id), value=lib.get_string('sprint:stats:server:value', guild_id).format(quartiles[1], quartiles[0], quartiles[2]), inline=False)
+        return await context.send(embed=embed)
+
+    async def run_history(self, context):
+        """
+        Display the user's lifetime sprint statistics
+        @param context:
+        @return:
+        """
+        user = User.get(context.message.author.id, context.guild.id, context)
+        history = user.get_sprint_history()
+
+        if history['all'] is None:
+            return await context.send(user.get_mention() + ', ' + lib.get_string('sprint:history:none', user.get_guild()))
+
+        # Overall totals
+        totals = history['all']
+        message = lib.get_string('sprint:history', user.get_guild()).format(user.get_mention(), totals['sprints'], totals['words'], self.get_average_wpm(totals), totals['best_wpm'])
+
+        # Best wpm for each sprint length
+        message += lib.get_string('sprint:history:lengths', user.get_guild())
+        for row in history['length']:
+            message += lib.get_string('sprint:history:length', user.get_guild()).format(row['bucket'], row['best_wpm'], self.get_average_wpm(row), row['sprints'])
+
+        # Words written in the most recent months
+        message += lib.get_string('sprint:history:months', user.get_guild())
+        for row in history['month'][:self.HISTORY_MONTHS]:
+            message += lib.get_string('sprint:history:month', user.get_guild()).format(row['bucket'], row['words'], row['sprints'])
+
+        return await context.send(message)
+
+    def get_average_wpm(self, row):
+        """
+        Calculate the average wpm from a row of sprint aggregates
+        @param row:
+        @return:
+        """
+        return Sprint.calculate_wpm(int(row['words']), int(row['seconds'])) if int(row['seconds']) > 0 else 0
+
     async def run_purge(self, context):
         """
         Purge any users who asked for notifications but aren't on the server any more.
         @param context:
         @return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         purged = await Sprint.purge_notifications(context)
         if purged > 0:
             return await context.send(lib.get_string('sprint:purged', user.get_guild()).format(purged))
@@ -203,7 +287,7 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param shortname:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         sprint = Sprint(user.get_guild())
 
         # If there is no active sprint, then just display an error
@@ -229,7 +313,7 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         sprint = Sprint(user.get_guild())
 
         # If there is no active sprint, then just display an error
@@ -261,7 +345,7 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param amount:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         sprint = Sprint(user.get_guild())
 
         # If there is no active sprint, then just display an error
@@ -364,7 +448,7 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         sprint = Sprint(user.get_guild())
 
         # If there is no active sprint, then just display an error
@@ -399,7 +483,7 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         record = user.get_record('wpm')
 
         if record is None:
@@ -414,7 +498,7 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         sprint = Sprint(user.get_guild())
 
         # If there is no active sprint or the user is not joined to it, display an error
@@ -433,7 +517,7 @@ class SprintCommand(commands.Cog, CommandWrapper):
             sprint.cancel(context)
 
             # Decrement sprints_started stat for whoever started this one
-            creator = User(sprint.get_createdby(), sprint.get_guild())
+            creator = User.get(sprint.get_createdby(), sprint.get_guild())
             creator.add_stat('sprints_started', -1)
 
             # Display a message letting users know
@@ -447,7 +531,7 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param opt2: Argument 2 of the join command
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         sprint = Sprint(user.get_guild())
         project_id = None
         starting_wc = None
@@ -547,7 +631,7 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         sprint = Sprint(user.get_guild())
 
         # If there is no active sprint, then just display an error
@@ -577,8 +661,8 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
-        user.set_guild_setting('sprint_notify', 1)
+        user = User.get(context.message.author.id, context.guild.id, context)
+        Sprint.set_notify(user, True)
         return await context.send(user.get_mention() + ', ' + lib.get_string('sprint:notified', user.get_guild()))
 
     async def run_forget(self, context):
@@ -587,8 +671,8 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
-        user.set_guild_setting('sprint_notify', 0)
+        user = User.get(context.message.author.id, context.guild.id, context)
+        Sprint.set_notify(user, False)
         return await context.send(user.get_mention() + ', ' + lib.get_string('sprint:forgot', user.get_guild()))
 
     async def run_cancel(self, context):
@@ -597,7 +681,7 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param context:
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         sprint = Sprint(user.get_guild())
 
         # If there is no active sprint, then just display an error
@@ -628,7 +712,7 @@ class SprintCommand(commands.Cog, CommandWrapper):
         :param start: Time in minutes from now, that the sprint should start
         :return:
         """
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
         sprint = Sprint(user.get_guild())
 
         # Check if sprint is finished but not marked as completed, in which case we can mark it as complete
@@ -8,5 +8,6 @@ CREATE TABLE IF NOT EXISTS sprint_users (
     ending_wc INTEGER DEFAULT 0,
     project INTEGER NULL,
     event INTEGER NULL,
-    sprint_type VARCHAR(255) NULL
+    sprint_type VARCHAR(255) NULL,
+    INDEX sprint (sprint)
 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;
\ No newline at end of file
@@ -8,5 +8,6 @@ CREATE TABLE IF NOT EXISTS sprints (
     length BIGINT NOT NULL,
     createdby TEXT NOT NULL,
     created BIGINT NOT NULL,
-    completed BIGINT DEFAULT 0
+    completed BIGINT DEFAULT 0,
+    INDEX guild_completed (guild(32), completed)
 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;
\ No newline at end of file
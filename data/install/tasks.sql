@@ -6,5 +6,6 @@ CREATE TABLE IF NOT EXISTS tasks (
     objectid INTEGER NULL,
     processing INTEGER NOT NULL DEFAULT 0,
     recurring INTEGER NOT NULL DEFAULT 0,
-    runeveryseconds INTEGER NULL
+    runeveryseconds INTEGER NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;
\ No newline at end of file
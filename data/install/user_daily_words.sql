@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS user_daily_words (
+    user BIGINT NOT NULL,
+    day DATE NOT NULL,
+    guild BIGINT NOT NULL,
+    words INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user, day, guild)
+) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;
\ No newline at end of file
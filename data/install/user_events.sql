@@ -2,5 +2,7 @@ CREATE TABLE IF NOT EXISTS user_events (
     id INTEGER PRIMARY KEY auto_increment,
     event INTEGER NOT NULL,
     user TEXT NOT NULL,
-    words INTEGER NOT NULL DEFAULT 0
+    words INTEGER NOT NULL DEFAULT 0,
+    UNIQUE INDEX event_user (event, user(32)),
+    INDEX event_words (event, words)
 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;
\ No newline at end of file
@@ -2,8 +2,11 @@ CREATE TABLE IF NOT EXISTS user_goals_history (
     id INTEGER PRIMARY KEY auto_increment,
     user TEXT NOT NULL,
     type TEXT NOT NULL,
-    date TEXT NOT NULL,
+    date TEXT NULL,
+    period_start BIGINT NULL,
+    period_end BIGINT NULL,
     goal INTEGER NOT NULL,
     result INTEGER NOT NULL,
-    completed BOOLEAN NOT NULL
+    completed BOOLEAN NOT NULL,
+    INDEX user_type_period (user(32), type(16), period_start)
 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;
\ No newline at end of file
@@ -5,5 +5,7 @@ CREATE TABLE IF NOT EXISTS user_goals (
     goal INTEGER NOT NULL,
     current INTEGER NOT NULL,
     completed BOOLEAN NOT NULL,
-    reset BIGINT NOT NULL
+    reset BIGINT NOT NULL,
+    INDEX goal_reset (reset),
+    INDEX user_goal (user(32), type(16))
 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;
\ No newline at end of file
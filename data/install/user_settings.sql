@@ -3,5 +3,7 @@ CREATE TABLE IF NOT EXISTS user_settings (
     user TEXT NOT NULL,
     guild TEXT NULL,
     setting TEXT NOT NULL,
-    value TEXT NOT NULL
+    value TEXT NOT NULL,
+    INDEX user_setting (user(32), setting(32)),
+    INDEX guild_setting (guild(32), setting(32))
 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;
\ No newline at end of file
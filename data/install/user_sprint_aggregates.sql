@@ -0,0 +1,11 @@
+CREATE TABLE IF NOT EXISTS user_sprint_aggregates (
+    id INTEGER PRIMARY KEY auto_increment,
+    user BIGINT NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    bucket VARCHAR(10) NOT NULL,
+    sprints INTEGER NOT NULL DEFAULT 0,
+    words BIGINT NOT NULL DEFAULT 0,
+    seconds BIGINT NOT NULL DEFAULT 0,
+    best_wpm DECIMAL(10,1) NOT NULL DEFAULT 0,
+    UNIQUE KEY user_type_bucket (user, type, bucket)
+) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;
\ No newline at end of file
@@ -2,5 +2,6 @@ CREATE TABLE IF NOT EXISTS user_stats (
     id INTEGER PRIMARY KEY auto_increment,
     user TEXT NOT NULL,
     name TEXT NOT NULL,
-    value INTEGER DEFAULT 0
+    value INTEGER DEFAULT 0,
+    UNIQUE INDEX user_stat (user(32), name(64))
 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;
\ No newline at end of file
@@ -1,5 +1,6 @@
 CREATE TABLE IF NOT EXISTS user_xp (
     id INTEGER PRIMARY KEY auto_increment,
     user TEXT NOT NULL,
-    xp INTEGER DEFAULT 0
+    xp INTEGER DEFAULT 0,
+    UNIQUE INDEX user_xp_user (user(32))
 ) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci;
\ No newline at end of file
@@ -5,6 +5,7 @@ from os import path
 from datetime import datetime, timezone, timedelta, time
 from dateutil import relativedelta
 from structures.db import Database
+from structures.clock import Clock
 
 def get(file,as_object=True):
     """
@@ -20,19 +21,39 @@ def get(file,as_object=True):
         else:
             return json.load(data)
 
+# The language code of each guild, so it is only looked up once. Cleared by forget_lang when a guild changes it.
+GUILD_LANGS = {}
+
+# The strings of each language file, so they are only loaded once.
+LANG_STRINGS = {}
+
 def get_lang(guild_id):
     """
     Check which language file the guild is using
     @param guild_id: The guild ID
     @return string: The language code
     """
+    if guild_id in GUILD_LANGS:
+        return GUILD_LANGS[guild_id]
+
     db = Database.instance()
     result = db.get('guild_settings', {'guild': guild_id, 'setting': 'lang'})
 
     if result and is_supported_language(result['value']):
-        return result['value']
+        lang = result['value']
     else:
-        return 'en'
+        lang = 'en'
+
+    GUILD_LANGS[guild_id] = lang
+    return lang
+
+def forget_lang(guild_id):
+    """
+    Clear the cached language of a guild, so it is looked up again next time
+    @param guild_id:
+    @return:
+    """
+    GUILD_LANGS.pop(guild_id, None)
 
 def get_supported_languages():
     """
@@ -58,8 +79,10 @@ def get_string(str, guild_id):
     """
 
     lang = get_lang(guild_id)
-    path = f'./data/lang/{lang}.json'
-    strings = get(path, False)
+    if lang not in LANG_STRINGS:
+        LANG_STRINGS[lang] = get(f'./data/lang/{lang}.json', False)
+
+    strings = LANG_STRINGS[lang]
     return strings[str] if str in strings else f'[[{str}]]'
 
 def get_asset(asset, guild_id):
@@ -111,17 +134,30 @@ def is_number(value):
     except (ValueError, TypeError):
         return False
 
+# Canonical timezone names, keyed by their lowercase name, so they can be looked up whatever case they were typed in
+TIMEZONE_NAMES = {x.lower(): x for x in pytz.all_timezones}
+
+# pytz timezone objects, keyed by their canonical name
+TIMEZONE_CACHE = {}
+
+def get_timezone_name(timezone):
+    """
+    Get the canonical name of a timezone string, e.g. 'europe/london' would give 'Europe/London'
+    @param timezone:
+    @return: str|None None if the timezone is not valid
+    """
+    if not timezone:
+        return None
+
+    return TIMEZONE_NAMES.get(str(timezone).lower())
+
 def is_valid_timezone(timezone):
     """
     Check if the timezone string is valid
     @param timezone:
     @return:
     """
-    if not timezone:
-        return False
-
-    timezones = [x.lower() for x in pytz.all_timezones]
-    return timezone.lower() in timezones
+    return get_timezone_name(timezone) is not None
 
 def get_timezone(timezone):
     """
@@ -129,7 +165,67 @@ def get_timezone(timezone):
     @param timezone:
     @return:
     """
-    return pytz.timezone(timezone) if is_valid_timezone(timezone) else None
+    name = get_timezone_name(timezone)
+    if name is None:
+        return None
+
+    if name not in TIMEZONE_CACHE:
+        TIMEZONE_CACHE[name] = pytz.timezone(name)
+
+    return TIMEZONE_CACHE[name]
+
+# Goal period boundaries, keyed by (timezone, type), so they only need calculating once per period
+PERIOD_CACHE = {}
+
+def get_period_boundaries(timezone, type):
+    """
+    Get the boundaries of the current goal period in a timezone, as UTC timestamps.
+    These only change when a new period starts, so they are cached until then and repeated calls in the same period
+    are just a dictionary lookup.
+    @param timezone:
+    @param type: daily, weekly, monthly or yearly
+    @return: dict With 'start' and 'next' for the current period, and 'previous' as a tuple (start, end) for the last one
+    """
+    now = Clock.get().time()
+    key = (get_timezone_name(timezone), type)
+
+    cached = PERIOD_CACHE.get(key)
+    if cached is not None and cached['start'] <= now < cached['next']:
+        return cached
+
+    tz = get_timezone(timezone)
+    if tz is None:
+        raise pytz.exceptions.UnknownTimeZoneError(timezone)
+
+    length = get_period_length(type)
+    current = get_period_start_date(Clock.get().now(tz).date(), type)
+
+    boundaries = {
+        'start': get_local_midnight_utc(tz, current),
+        'next': get_local_midnight_utc(tz, current + length),
+        'previous': (get_local_midnight_utc(tz, current - length), get_local_midnight_utc(tz, current)),
+    }
+
+    PERIOD_CACHE[key] = boundaries
+    return boundaries
+
+def get_period_boundaries_many(timezones, type):
+    """
+    Get the boundaries of the current goal period for a list of timezones.
+    This is a simple loop over get_period_boundaries, so each timezone is only worked out once per period and after
+    that it is a cache lookup. Invalid timezones are left out of the results, rather than raising an error.
+    @param timezones:
+    @param type: daily, weekly, monthly or yearly
+    @return: dict Boundaries keyed by timezone
+    """
+    results = {}
+    for timezone in set(timezones):
+        try:
+            results[timezone] = get_period_boundaries(timezone, type)
+        except pytz.exceptions.UnknownTimeZoneError:
+            pass
+
+    return results
 
 def get_midnight_utc(timezone, type):
     """
@@ -140,57 +236,117 @@ def get_midnight_utc(timezone, type):
     :param type: daily, weekly, monthly or yearly
     :return:
     """
+    return get_period_boundaries(timezone, type)['next']
 
-    tz = pytz.timezone(timezone)
-    today = datetime.now(tz)
-
+def get_period_start_date(today, type):
+    """
+    Get the date the current goal period started on, e.g. the Monday of this week for weekly goals
+    @param today: date
+    @param type: daily, weekly, monthly or yearly
+    @return: date
+    """
     if type == "daily":
-        # Today plus 1 day, at midnight.
-        relative = relativedelta.relativedelta(days=1, hour=0, minute=0, second=0)
+        return today
     elif type == "weekly":
-        # Next Monday, at midnight.
-        relative = relativedelta.relativedelta(days=-today.weekday(), weeks=1, hour=0, minute=0, second=0)
+        return today - relativedelta.relativedelta(days=today.weekday())
     elif type == "monthly":
-        # First of next month, at midnight.
-        relative = relativedelta.relativedelta(months=1, day=1, hour=0, minute=0, second=0)
+        return today.replace(day=1)
     elif type == "yearly":
-        # First of next year, at midnight.
-        relative = relativedelta.relativedelta(years=1, month=1, day=1, hour=0, minute=0, second=0)
+        return today.replace(month=1, day=1)
+
+def get_period_length(type):
+    """
+    Get the length of a goal period
+    @param type: daily, weekly, monthly or yearly
+    @return: relativedelta
+    """
+    return {
+        'daily': relativedelta.relativedelta(days=1),
+        'weekly': relativedelta.relativedelta(weeks=1),
+        'monthly': relativedelta.relativedelta(months=1),
+        'yearly': relativedelta.relativedelta(years=1),
+    }[type]
+
+def get_previous_period(timezone, type):
+    """
+    Given a type of goal, get the start and end of the previous goal period, as UTC timestamps, for the history table.
+    E.g. a daily goal would give you midnight yesterday to midnight today, in the user's timezone.
+    @param timezone:
+    @param type: daily, weekly, monthly or yearly
+    @return: tuple (start, end)
+    """
+    return get_period_boundaries(timezone, type)['previous']
+
+def get_history_window(timezone, type, page, periods):
+    """
+    Get a page of goal history as a calendar window, e.g. page 2 of daily history with 14 periods per page would be the
+    14 days before the most recent 14. Any history records with a period_start inside the window are on that page.
+    @param timezone:
+    @param type: daily, weekly, monthly or yearly
+    @param page: Page number, starting at 1
+    @param periods: Number of periods on each page
+    @return: tuple (start, end) UTC timestamps, with the end not included
+    """
+    tz = get_timezone(timezone)
+    if tz is None:
+        raise pytz.exceptions.UnknownTimeZoneError(timezone)
 
-    next = today + relative
-    next_utc = next.astimezone(pytz.utc)
+    length = get_period_length(type) * periods
+    end = get_period_start_date(Clock.get().now(tz).date(), type) - (length * (page - 1))
+    start = end - length
 
-    return int(next_utc.timestamp())
+    return get_local_midnight_utc(tz, start), get_local_midnight_utc(tz, end)
 
+def get_local_midnight_utc(tz, date):
+    """
+    Get the UTC timestamp of midnight on a date, in a timezone
+    @param tz: pytz timezone
+    @param date:
+    @return: int
+    """
+    return int(tz.localize(datetime.combine(date, time())).timestamp())
 
-def get_previous_date(timezone, type):
+def format_period(start, end, type, timezone):
     """
-    Given a type of goal, get the previous goal's date, for the history table.
-    E.g. a daily goal would give you yesterday's date. A monthly goal would give you the first of last month.
+    Format a goal period for display, e.g. '01 Jan 2021' for daily goals or '01 Jan 2021 - 08 Jan 2021' for weekly goals
+    @param start: UTC timestamp
+    @param end: UTC timestamp
     @param type:
-    @return:
+    @param timezone:
+    @return: str
     """
-    tz = pytz.timezone(timezone)
-    today = datetime.now(tz)
+    tz = get_timezone(timezone) or pytz.utc
+    start = datetime.fromtimestamp(int(start), tz)
+    end = datetime.fromtimestamp(int(end), tz)
 
     if type == "daily":
-        previous = today - relativedelta.relativedelta(days=1)
-        format = '%d %b %Y'
-        date = datetime.strftime(previous, format)
+        return datetime.strftime(start, '%d %b %Y')
     elif type == "weekly":
-        previous = today - relativedelta.relativedelta(weeks=1)
-        format = '%d %b %Y'
-        date = datetime.strftime(previous, format) + ' - ' + datetime.strftime(today, format)
+        return datetime.strftime(start, '%d %b %Y') + ' - ' + datetime.strftime(end, '%d %b %Y')
     elif type == "monthly":
-        previous = today - relativedelta.relativedelta(months=1)
-        format = '%b %Y'
-        date = datetime.strftime(previous, format)
-    elif type == "yearly":
-        previous = today - relativedelta.relativedelta(years=1)
-        format = '%Y'
-        date = datetime.strftime(previous, format)
+        return datetime.strftime(start, '%b %Y')
+    else:
+        return datetime.strftime(start, '%Y')
+
+def format_daily_words(days, goal=None, width=10):
+    """
+    Format a list of daily word counts as lines of a bar chart, e.g. '`Mon 05 Oct` ██████ 600'
+    @param days: list of (date, words) tuples
+    @param goal: Daily goal to mark the days it was met, if there is one
+    @param width: Width of the longest bar
+    @return: list of lines
+    """
+    most = max([words for day, words in days] + [goal or 0, 1])
+
+    lines = []
+    for day, words in days:
+        bar = '█' * int(round(width * max(words, 0) / most))
+        line = '`' + datetime.strftime(day, '%a %d %b') + '` ' + bar + ' ' + str(words)
+        if goal and words >= goal:
+            line += ' :white_check_mark:'
+        lines.append(line)
 
-    return date
+    return lines
 
 def secs_to_mins(seconds):
     """
@@ -0,0 +1,228 @@
+import asyncio, numpy, pymysql, time
+from structures.clock import Clock
+from structures.db import Database
+from structures.sprint import Sprint
+
+class SprintAnalytics:
+    """
+    Statistics over the sprint history of a guild or a user, worked out with NumPy.
+    The history is loaded once into arrays (one value per completed sprint result), so things like a percentile rank
+    against hundreds of thousands of sprints are a single sorted search, rather than a query each time.
+    """
+
+    CACHE_TTL = 300 # Seconds to keep a loaded history before loading it again
+
+    SECONDS_PER_DAY = 86400
+
+    # Sprint results which had a word count, with the words and time worked out the same way as the sprint results.
+    HISTORY_SQL = 'SELECT su.user AS user, s.start AS start, ' \
+                  'IF(su.ending_wc = 0, su.current_wc, su.ending_wc) - su.starting_wc AS words, ' \
+                  'IF(su.timejoined <= 0 OR s.end_reference = 0, s.length, s.end_reference - su.timejoined) AS seconds ' \
+                  'FROM sprint_users su INNER JOIN sprints s ON s.id = su.sprint ' \
+                  'WHERE s.completed > 0 AND (su.sprint_type IS NULL OR su.sprint_type != %s) ' \
+                  'AND IF(su.ending_wc = 0, su.current_wc, su.ending_wc) > 0 ' \
+                  'AND IF(su.ending_wc = 0, su.current_wc, su.ending_wc) != su.starting_wc '
+
+    _cache = {}
+    _loading = {}
+
+    def __init__(self, rows):
+
+        count = len(rows)
+        self.users = numpy.fromiter((int(row['user']) for row in rows), dtype=numpy.int64, count=count)
+        self.start = numpy.fromiter((int(row['start']) for row in rows), dtype=numpy.int64, count=count)
+        self.words = numpy.fromiter((int(row['words']) for row in rows), dtype=numpy.int64, count=count)
+        self.seconds = numpy.fromiter((int(row['seconds']) for row in rows), dtype=numpy.int64, count=count)
+
+        # Work out the wpm of every result at once. Results with no time can't have a wpm, so they are left out.
+        valid = self.seconds > 0
+        self.users = self.users[valid]
+        self.start = self.start[valid]
+        self.words = self.words[valid]
+        self.seconds = self.seconds[valid]
+        self.wpm = numpy.round(self.words / (self.seconds / 60), 1)
+
+        # Keep a sorted copy of the wpm values, for percentiles.
+        self.sorted_wpm = numpy.sort(self.wpm)
+
+    def count(self):
+        return len(self.wpm)
+
+    def filter_user(self, user):
+        """
+        Get the analytics for just one user's results out of these
+        :param user:
+        :return: SprintAnalytics
+        """
+        mask = self.users == int(user)
+        analytics = SprintAnalytics([])
+        analytics.users = self.users[mask]
+        analytics.start = self.start[mask]
+        analytics.words = self.words[mask]
+        analytics.seconds = self.seconds[mask]
+        analytics.wpm = self.wpm[mask]
+        analytics.sorted_wpm = numpy.sort(analytics.wpm)
+        return analytics
+
+    def get_average_wpm(self):
+        """
+        Get the average wpm across all the time sprinted
+        :return: float
+        """
+        seconds = self.seconds.sum()
+        return round(float(self.words.sum() / (seconds / 60)), 1) if seconds > 0 else 0.0
+
+    def get_best_wpm(self):
+        return float(self.wpm.max()) if self.count() > 0 else 0.0
+
+    def get_percentile(self, wpm):
+        """
+        Get the percentage of results which had a wpm at or below the given value
+        :param wpm:
+        :return: float
+        """
+        if self.count() == 0:
+            return 0.0
+
+        position = numpy.searchsorted(self.sorted_wpm, wpm, side='right')
+        return round(100 * float(position) / self.count(), 1)
+
+    def get_quartiles(self):
+        """
+        Get the 25th, 50th and 75th percentile wpm
+        :return: list
+        """
+        if self.count() == 0:
+            return [0.0, 0.0, 0.0]
+
+        return [round(float(value), 1) for value in numpy.percentile(self.wpm, [25, 50, 75])]
+
+    def get_distribution(self, bins=10):
+        """
+        Get a histogram of the wpm values
+        :param bins:
+        :return: tuple (counts, edges)
+        """
+        return numpy.histogram(self.wpm, bins=bins)
+
+    def get_streaks(self, now=None):
+        """
+        Get the current and longest streaks of consecutive (UTC) days with at least one sprint
+        :param now: Timestamp to check the current streak against
+        :return: tuple (current, longest)
+        """
+        if self.count() == 0:
+            return 0, 0
+
+        days = numpy.unique(self.start // self.SECONDS_PER_DAY)
+
+        # Each time the gap between two sprint days is more than 1, a new streak begins.
+        breaks = numpy.flatnonzero(numpy.diff(days) != 1)
+        starts = numpy.concatenate(([0], breaks + 1))
+        ends = numpy.concatenate((breaks, [len(days) - 1]))
+        lengths = ends - starts + 1
+
+        # The last streak is only current if it includes today or yesterday.
+        today = int(now if now is not None else Clock.get().time()) // self.SECONDS_PER_DAY
+        current = int(lengths[-1]) if today - days[-1] <= 1 else 0
+
+        return current, int(lengths.max())
+
+    def get_trend(self):
+        """
+        Get the trend of the wpm over time, from a least squares line through the results
+        :return: float Change in wpm per 30 days, or None if there isn't enough history
+        """
+        if self.count() < 2 or self.start.min() == self.start.max():
+            return None
+
+        days = (self.start - self.start.min()) / self.SECONDS_PER_DAY
+        slope = numpy.polyfit(days, self.wpm, 1)[0]
+        return round(float(slope) * 30, 1)
+
+    def get_key(guild=None, user=None):
+        """
+        Get the cache key of a history. Ids can come from discord (ints) or the database (strings), so they are all
+        made into strings.
+        :param guild:
+        :param user:
+        :return: tuple
+        """
+        return tuple(str(id) if id is not None else None for id in (guild, user))
+
+    def get_cached(guild=None, user=None):
+        """
+        Get the sprint history of a guild or a user, only if it is already loaded and hasn't expired
+        :param guild:
+        :param user:
+        :return: SprintAnalytics|None
+        """
+        cached = SprintAnalytics._cache.get(SprintAnalytics.get_key(guild, user))
+        if cached is not None and cached[0] > time.time():
+            return cached[1]
+
+        return None
+
+    async def load(guild=None, user=None):
+        """
+        Load the sprint history of a guild or a user (or a user on a guild) into an analytics object.
+        These are cached for a few minutes, as the history is only added to when sprints complete.
+        The history can be large, so it is loaded in another thread, with its own database connection, to keep the bot
+        responding while it loads.
+        :param guild:
+        :param user:
+        :return: SprintAnalytics
+        """
+        cached = SprintAnalytics.get_cached(guild, user)
+        if cached is not None:
+            return cached
+
+        key = SprintAnalytics.get_key(guild, user)
+
+        # If it's already being loaded (e.g. two sprints finishing at once), wait for that rather than loading it twice.
+        pending = SprintAnalytics._loading.get(key)
+        if pending is not None:
+            return await pending
+
+        pending = asyncio.get_event_loop().run_in_executor(None, SprintAnalytics.fetch, guild, user)
+        SprintAnalytics._loading[key] = pending
+        try:
+            analytics = await pending
+        finally:
+            SprintAnalytics._loading.pop(key, None)
+
+        # Clear out anything which has expired, so the cache doesn't keep growing, then add this one.
+        now = time.time()
+        for expired in [k for k, v in SprintAnalytics._cache.items() if v[0] <= now]:
+            del SprintAnalytics._cache[expired]
+
+        SprintAnalytics._cache[key] = (now + SprintAnalytics.CACHE_TTL, analytics)
+        return analytics
+
+    def fetch(guild=None, user=None):
+        """
+        Query the sprint history and build the analytics object from it.
+        This is run in another thread, so it uses a connection of its own rather than the bot's shared one.
+        :param guild:
+        :param user:
+        :return: SprintAnalytics
+        """
+        sql = SprintAnalytics.HISTORY_SQL
+        params = [Sprint.SPRINT_TYPE_NO_WORDCOUNT]
+
+        # The guild and user columns are text, so they are compared as strings to make use of the indexes.
+        if guild is not None:
+            sql += 'AND s.guild = %s '
+            params.append(str(guild))
+
+        if user is not None:
+            sql += 'AND su.user = %s '
+            params.append(str(user))
+
+        connection = Database.instance().connect()
+        try:
+            cursor = connection.cursor(pymysql.cursors.DictCursor)
+            cursor.execute(sql, params)
+            return SprintAnalytics(cursor.fetchall())
+        finally:
+            connection.close()
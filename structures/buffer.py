@@ -0,0 +1,66 @@
+class MessageBuffer:
+    """
+    Collects messages meant for one channel, so they can be sent together in as few messages as possible, instead of
+    one API call each. Used for things like the level up and goal messages during sprint results.
+    """
+
+    # Discord's maximum message length.
+    LIMIT = 2000
+
+    def __init__(self):
+        self._messages = []
+
+    def add(self, message):
+        """
+        Add a message to the buffer
+        :param message:
+        :return:
+        """
+        self._messages.append(str(message))
+
+    def is_empty(self):
+        return len(self._messages) == 0
+
+    def get_chunks(self):
+        """
+        Join the buffered messages together, one per line, split into chunks which fit within the message limit.
+        Messages are only split up themselves if they are longer than the limit on their own.
+        :return: list
+        """
+        chunks = []
+        current = ''
+
+        for message in self._messages:
+
+            # Split up any message which is too long to ever fit in one chunk.
+            while len(message) > self.LIMIT:
+                if current:
+                    chunks.append(current)
+                    current = ''
+                chunks.append(message[:self.LIMIT])
+                message = message[self.LIMIT:]
+
+            if current and len(current) + 1 + len(message) > self.LIMIT:
+                chunks.append(current)
+                current = ''
+
+            current = current + '\n' + message if current else message
+
+        if current:
+            chunks.append(current)
+
+        return chunks
+
+    async def flush(self, send):
+        """
+        Send everything in the buffer and empty it
+        :param send: Coroutine function to send each message with, e.g. `context.send`
+        :return: int Number of messages sent
+        """
+        chunks = self.get_chunks()
+        self._messages = []
+
+        for chunk in chunks:
+            await send(chunk)
+
+        return len(chunks)
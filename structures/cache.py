@@ -0,0 +1,63 @@
+import time
+from collections import OrderedDict
+from structures.metrics import Metrics
+
+class Cache:
+    """
+    Bounded in-memory cache, which drops the least recently used entry when it is full, and treats entries as missing
+    once they are older than their time to live.
+    Hits, misses and evictions are recorded in the Metrics under the cache's name, so the hit rate can be checked.
+    """
+
+    def __init__(self, name, size, ttl):
+        self.name = name
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """
+        Get a value from the cache
+        :param key:
+        :return: The cached value, or None if it isn't cached or has expired
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+
+            if entry[0] > time.time():
+                self._entries.move_to_end(key)
+                Metrics.instance().record_cache(self.name, 'hits')
+                return entry[1]
+
+            del self._entries[key]
+
+        Metrics.instance().record_cache(self.name, 'misses')
+        return None
+
+    def set(self, key, value):
+        """
+        Add a value to the cache, dropping the least recently used values if it is now too big
+        :param key:
+        :param value:
+        :return:
+        """
+        self._entries[key] = (time.time() + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+            Metrics.instance().record_cache(self.name, 'evictions')
+
+    def delete(self, key):
+        """
+        Remove a value from the cache, e.g. when it has been changed
+        :param key:
+        :return:
+        """
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def count(self):
+        return len(self._entries)
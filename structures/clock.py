@@ -0,0 +1,74 @@
+import time
+from datetime import datetime
+
+class Clock:
+    """
+    The clock used by anything which is scheduled: tasks, sprints, reminders, events and goal resets.
+    The bot always uses the real clock. Benchmarks and simulations can swap in a VirtualClock with `Clock.use()`, to
+    control the time and fast-forward through days or years in seconds.
+    """
+
+    _current = None
+
+    def time(self):
+        """
+        Get the current UTC timestamp
+        :return: float
+        """
+        return time.time()
+
+    def now(self, tz=None):
+        """
+        Get the current datetime, in the given timezone
+        :param tz:
+        :return: datetime
+        """
+        return datetime.now(tz)
+
+    def get():
+        """
+        Get the clock currently in use
+        :return: Clock
+        """
+        if Clock._current is None:
+            Clock._current = Clock()
+        return Clock._current
+
+    def use(clock):
+        """
+        Swap the clock in use. Passing None goes back to the real clock.
+        :param clock:
+        :return:
+        """
+        Clock._current = clock
+
+
+class VirtualClock(Clock):
+    """
+    A clock which only moves when it is told to.
+    """
+
+    def __init__(self, timestamp=None):
+        self._time = float(timestamp) if timestamp is not None else time.time()
+
+    def time(self):
+        return self._time
+
+    def now(self, tz=None):
+        return datetime.fromtimestamp(self._time, tz)
+
+    def set(self, timestamp):
+        """
+        Set the clock to a specific UTC timestamp
+        :param timestamp:
+        :return:
+        """
+        self._time = float(timestamp)
+
+    def advance(self, seconds):
+        """
+        Move the clock forward by a number of seconds
+        :param seconds:
+        :return:
+        """
+        self._time += seconds
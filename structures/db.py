@@ -1,4 +1,6 @@
 import sys, os, lib, pymysql, warnings
+from contextlib import contextmanager
+from pymysql.constants import CLIENT
 from structures.singleton import Singleton
 
 # sys.path.append(os.path.abspath('../'))
@@ -12,15 +14,34 @@ class Database:
         self.__path = os.path.abspath(os.path.dirname(__file__))
 
         # Load the connection configuration
-        config = lib.get(self.__path + '/../settings.json')
-        self.connection = pymysql.connect(host=config.db_host, user=config.db_user, passwd=config.db_pass, db=config.db_name, autocommit=True)
+        self.__config = lib.get(self.__path + '/../settings.json')
+        self.connection = self.connect()
 
         # Set the cursor to be used, with DictCursor so we can refer to results by their keys
         self.cursor = self.connection.cursor(pymysql.cursors.DictCursor)
 
+        # Separate connection which allows multiple statements, only used by get_all_multi. It is opened the first time
+        # it is needed.
+        self.__multi_connection = None
+        self.__multi_cursor = None
+
+        # How many transaction blocks we are currently inside. See transaction().
+        self._transactions = 0
+
     # Close connection on destruction of object
     def __del__(self):
         self.connection.close()
+        if self.__multi_connection is not None:
+            self.__multi_connection.close()
+
+    def connect(self, client_flag=0):
+        """
+        Open a new connection to the database
+        :param client_flag: Any extra client flags, e.g. CLIENT.MULTI_STATEMENTS
+        :return:
+        """
+        config = self.__config
+        return pymysql.connect(host=config.db_host, user=config.db_user, passwd=config.db_pass, db=config.db_name, autocommit=True, client_flag=client_flag)
 
     def install(self):
 
@@ -46,6 +67,25 @@ class Database:
             self.connection.commit()
             return True
 
+    def __build_where(self, where, params):
+
+        clauses = []
+
+        for field, value in where.items():
+
+            # Lists of values are matched with an IN clause. An empty list can never match anything.
+            if isinstance(value, (list, tuple, set)):
+                if len(value) == 0:
+                    clauses.append('1 = 0')
+                else:
+                    clauses.append(field + ' IN (' + ', '.join(['%s'] * len(value)) + ')')
+                    params.extend(value)
+            else:
+                clauses.append(field + ' = %s')
+                params.append(value)
+
+        return ' AND '.join(clauses) + ' '
+
     def __build_get(self, table, where=None, fields=['*'], sort=None, limit=None):
 
         params = []
@@ -55,15 +95,7 @@ class Database:
 
         # Did we specify some WHERE clauses?
         if where is not None:
-
-            sql += 'WHERE '
-
-            for field, value in where.items():
-                sql += field + ' = %s AND '
-                params.append(value)
-
-            # Remove the last 'AND '
-            sql = sql[:-4]
+            sql += 'WHERE ' + self.__build_where(where, params)
 
         # Did we specify some sorting?
         if sort is not None:
@@ -91,14 +123,7 @@ class Database:
     def __build_delete(self, table, params):
 
         sql_params = []
-        sql = 'DELETE FROM ' + table + ' WHERE '
-
-        for field, value in params.items():
-            sql += field + ' = %s AND '
-            sql_params.append(value)
-
-        # Remove the last 'AND '
-        sql = sql[:-4]
+        sql = 'DELETE FROM ' + table + ' WHERE ' + self.__build_where(params, sql_params)
 
         # Execute the query
         self.cursor.execute(sql, sql_params)
@@ -118,14 +143,7 @@ class Database:
 
         # Where clauses
         if where is not None:
-            sql += ' WHERE '
-
-            for field, value in where.items():
-                sql += field + ' = %s AND '
-                sql_params.append(value)
-
-            # Remove the last 'AND '
-            sql = sql[:-4]
+            sql += ' WHERE ' + self.__build_where(where, sql_params)
 
         # Execute the query
         self.cursor.execute(sql, sql_params)
@@ -146,10 +164,50 @@ class Database:
         self.cursor.execute(sql, params)
         return self.cursor.fetchall()
 
+    def get_all_multi(self, queries):
+        """
+        Run a number of SELECT queries in one round trip to the database, by sending them as one multi-statement query.
+        Multiple statements are only allowed on a separate connection used just for this, so they can't be stacked onto
+        any other query the bot runs.
+        As it is a separate connection, it won't see anything which hasn't been committed yet inside a transaction().
+        :param queries: list of (sql, params) tuples
+        :return: list The results of each query, in the same order
+        """
+        if self.__multi_connection is None:
+            self.__multi_connection = self.connect(CLIENT.MULTI_STATEMENTS)
+            self.__multi_cursor = self.__multi_connection.cursor(pymysql.cursors.DictCursor)
+
+        cursor = self.__multi_cursor
+        sql = '; '.join(cursor.mogrify(query, params) for query, params in queries)
+        cursor.execute(sql)
+
+        # Every result set has to be read, or the next query on the connection would fail.
+        results = [cursor.fetchall()]
+        while cursor.nextset():
+            results.append(cursor.fetchall())
+
+        return results
+
     def insert(self, table, params):
         self.__build_insert(table, params)
         return self.cursor.rowcount
 
+    def insert_many(self, table, rows):
+        """
+        Insert a list of rows, which must all have the same fields, in one go.
+        pymysql sends these as multi-row INSERT statements, instead of one query per row.
+        :param table:
+        :param rows: list of dictionaries
+        :return: int Number of rows inserted
+        """
+        if not rows:
+            return 0
+
+        fields = list(rows[0].keys())
+        sql = 'INSERT INTO ' + table + ' (' + ', '.join(fields) + ') VALUES (' + ', '.join(['%s'] * len(fields)) + ')'
+        self.cursor.executemany(sql, [[row[field] for field in fields] for row in rows])
+        return self.cursor.rowcount
+
     def delete(self, table, params):
         self.__build_delete(table, params)
         return self.cursor.rowcount
@@ -158,5 +216,54 @@ class Database:
         self.__build_update(table, params, where)
         return self.cursor.rowcount
 
+    def update_many(self, table, rows, key='id'):
+        """
+        Update a list of rows, each with their own values, in one UPDATE statement using CASE on the key field
+        :param table:
+        :param rows: list of dictionaries, which must all have the key field and the same fields to update
+        :param key:
+        :return: int Number of rows updated
+        """
+        if not rows:
+            return 0
+
+        params = []
+        sets = []
+
+        for field in [field for field in rows[0].keys() if field != key]:
+            sets.append(field + ' = CASE ' + key + ' ' + ' '.join(['WHEN %s THEN %s'] * len(rows)) + ' END')
+            for row in rows:
+                params += [row[key], row[field]]
+
+        params += [row[key] for row in rows]
+
+        sql = 'UPDATE ' + table + ' SET ' + ', '.join(sets) + ' WHERE ' + key + ' IN (' + ', '.join(['%s'] * len(rows)) + ')'
+        self.cursor.execute(sql, params)
+        return self.cursor.rowcount
+
     def execute(self, sql, params):
         return self.cursor.execute(sql, params)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run a block of queries in a transaction, so either all of them are saved or, if anything fails, none of them are.
+        If transactions are nested, everything is committed or rolled back by the outermost one.
+        Everything shares the one connection, so nothing inside the block should await, or queries from other commands
+        could end up in the transaction.
+        """
+        if self._transactions == 0:
+            self.connection.begin()
+
+        self._transactions += 1
+        try:
+            yield self
+        except:
+            self._transactions -= 1
+            if self._transactions == 0:
+                self.connection.rollback()
+            raise
+        else:
+            self._transactions -= 1
+            if self._transactions == 0:
+                self.connection.commit()
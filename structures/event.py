@@ -1,17 +1,25 @@
-import discord, lib, time
+import discord, lib
+from structures.cache import Cache
 from structures.db import Database
+from structures.clock import Clock
+from structures.registry import EventRegistry
+from structures.task import Task
 from structures.user import User
 
+# Rendered leaderboard embeds, by event id. They are forgotten whenever words are added to the event.
+LEADERBOARD_CACHE = Cache('event_leaderboard', 1000, 60)
+
 class Event:
 
     DEFAULT_COLOUR = 15105570
     LEADERBOARD_LIMIT = 10
+    MEMBERS_CHUNK = 100  # Most members discord will look up at once
     TASKS = {
         'start': 'start',  # This is the task for starting the event
         'end': 'end',  # This is the task for ending the event
     }
 
-    def __init__(self, id):
+    def __init__(self, id=None, record=None):
         self.__db = Database.instance()
         self.__bot = None
         self.__context = None
@@ -29,7 +37,9 @@ class Event:
         self.started = None
         self.ended = None
 
-        record = self.__db.get('events', {'id': id})
+        if record is None:
+            record = self.__db.get('events', {'id': id})
+
         if record:
             self.id = record['id']
             self.guild = record['guild']
@@ -261,6 +271,8 @@ class Event:
         Delete the event
         :return:
         """
+        LEADERBOARD_CACHE.delete(self.id)
+        EventRegistry.instance().remove_event(self.id)
         return self.__db.delete('events', {'id': self.id})
 
     def save(self):
@@ -268,7 +280,8 @@ class Event:
         Save the current state of the event
         :return:
         """
-        return self.__db.update('events', {
+        LEADERBOARD_CACHE.delete(self.id)
+        record = {
             'title': self.title,
             'channel': self.channel,
             'description': self.description,
@@ -278,14 +291,24 @@ class Event:
             'enddate': self.enddate,
             'started': self.started,
             'ended': self.ended
-        }, {'id': self.id})
+        }
+        result = self.__db.update('events', record, {'id': self.id})
+
+        # Keep the registry up to date, taking the event out of it once it has ended.
+        registry = EventRegistry.instance()
+        if self.ended:
+            registry.remove_event(self.id)
+        else:
+            registry.set_event(dict(record, id=self.id, guild=self.guild))
+
+        return result
 
     async def start(self):
         """
         Start the event
         :return:
         """
-        now = int(time.time())
+        now = int(Clock.get().time())
         self.set_started(now)
         self.save()
         await self.say( lib.get_string('event:begin', self.get_guild()).format(self.get_title()) )
@@ -295,7 +318,7 @@ class Event:
         End the event
         :return:
         """
-        now = int(time.time())
+        now = int(Clock.get().time())
         self.set_ended(now)
         self.save()
         await self.say( lib.get_string('event:ended', self.get_guild()).format(self.get_title()) )
@@ -320,6 +343,7 @@ class Event:
         :param amount:
         :return:
         """
+        LEADERBOARD_CACHE.delete(self.get_id())
         record = self.__db.get('user_events', {'user': user_id, 'event': self.get_id()})
         if record:
             return self.__db.update('user_events', {'words': amount}, {'id': record['id']})
@@ -337,12 +361,26 @@ class Event:
         :param amount:
         :return:
         """
-        amount = int(amount)
-        record = self.__db.get('user_events', {'user': user_id, 'event': self.get_id()})
-        if record:
-            amount = int(record['words']) + amount
+        return self.add_words_many({user_id: amount})
 
-        return self.update_wordcount(user_id, amount)
+    def add_words_many(self, amounts):
+        """
+        Add to the word counts of a number of users for the event, with one query
+        :param amounts: dict Words to add, keyed by user id
+        :return:
+        """
+        if not amounts:
+            return 0
+
+        LEADERBOARD_CACHE.delete(self.get_id())
+
+        params = []
+        for user_id, amount in amounts.items():
+            params += [self.get_id(), str(user_id), int(amount)]
+
+        sql = 'INSERT INTO user_events (event, user, words) VALUES ' + ', '.join(['(%s, %s, %s)'] * len(amounts)) + ' ' \
+              'ON DUPLICATE KEY UPDATE words = words + VALUES(words)'
+        return self.__db.execute(sql, params)
 
     async def say(self, message, embed=False):
         """
@@ -362,28 +400,29 @@ class Event:
             else:
                 return await channel.send(message)
 
-    def get_users(self, limit=None):
+    def get_users(self, limit=None, offset=0):
         """
         Get the users taking part in the event, ordered by words written descending
+        :param limit: Maximum number of users to return, or None for all of them
+        :param offset: Number of users to skip, for reading through them in chunks
         :return:
         """
-        records = self.__db.get_all('user_events', {'event': self.id}, '*', ['words DESC'])
-        users = []
-        x = 1
-
-        for record in records:
-
-            users.append({
-                'user': record['user'],
-                'words': record['words']
-            })
+        sql = 'SELECT user, words FROM user_events WHERE event = %s ORDER BY words DESC, id ASC'
+        params = [self.id]
 
-            x += 1
+        if limit is not None:
+            sql += ' LIMIT %s OFFSET %s'
+            params += [int(limit), int(offset)]
 
-            if limit is not None and x > limit:
-                break
+        return [{'user': record['user'], 'words': record['words']} for record in self.__db.get_all_sql(sql, params)]
 
-        return users
+    def count_users(self):
+        """
+        Get the number of users taking part in the event
+        :return: int
+        """
+        record = self.__db.get('user_events', {'event': self.id}, ['COUNT(*) as total'])
+        return int(record['total']) if record else 0
 
     def get_total_wordcount(self):
         """
@@ -395,12 +434,16 @@ class Event:
 
     async def get_leaderboard(self, limit=None):
         """
-        Build the embedded leaderboard to display
+        Build the embedded leaderboard to display.
+        The embed is cached for a short time, until the next words are added to the event.
         :return:
         """
+        key = (limit, self.is_ended())
+        cached = LEADERBOARD_CACHE.get(self.get_id())
+        if cached is not None and key in cached:
+            return cached[key]
 
         config = lib.get('./settings.json')
-        users = self.get_users()
 
         # Build the embedded leaderboard message
         title = self.get_title() + ' - ' + lib.get_string('event:leaderboard', self.get_guild())
@@ -425,26 +468,25 @@ class Event:
         if footer:
             embed.set_footer(text=footer, icon_url=config.avatar)
 
-        # Get an array of all the user ids, so we can fetch them and make sure they still exist on the guild.
-        user_ids = list(map(lambda row: row['user'], users))
+        # Read through the users in order, a chunk at a time, until the leaderboard is full or we run out of users.
+        # Each chunk is looked up on the guild, so anyone who has left it is skipped.
+        position = 1
+        offset = 0
 
-        # Using those user_ids, look them all up and return a list of those which are still on the guild.
-        if user_ids:
-            members = await self.__guild.query_members(limit=100, cache=False, user_ids=user_ids)
+        while position <= self.LEADERBOARD_LIMIT:
 
-            # Create a sub method to find a user in the members list by their id
-            def find_member(id):
-                for m in members:
-                    if m.id == id:
-                        return m
-                return None
+            users = self.get_users(self.MEMBERS_CHUNK, offset)
+            if not users:
+                break
 
-            # Loop through the users, filtering out any which are not on the guild and returning their name for display.
-            position = 1
+            offset += len(users)
+            user_ids = [int(row['user']) for row in users]
+            members = await self.__guild.query_members(limit=len(user_ids), cache=False, user_ids=user_ids)
+            members = {member.id: member for member in members}
 
             for user in users:
 
-                member = find_member(int(user['user']))
+                member = members.get(int(user['user']))
                 if member is not None and position <= self.LEADERBOARD_LIMIT:
 
                     # Build the name and words variables to display in the list
@@ -457,6 +499,13 @@ class Event:
                     # Increment position
                     position += 1
 
+            if len(users) < self.MEMBERS_CHUNK:
+                break
+
+        cached = cached if cached is not None else {}
+        cached[key] = embed
+        LEADERBOARD_CACHE.set(self.get_id(), cached)
+
         return embed
 
     def _task_prechecks(self, bot):
@@ -524,17 +573,50 @@ class Event:
         """
         db = Database.instance()
 
-        # If we are including ones which have ended, just try and get the last one
+        # If we are including ones which have ended, just try and get the last one.
+        # Otherwise the current event on the guild is in the registry, so there's no need to query.
         if include_ended:
             record = db.get('events', {'guild': guild_id}, ['id'], ['id DESC'])
-        else:
-            record = db.get('events', {'guild': guild_id, 'ended': 0})
+            return Event(record['id']) if record else None
 
+        record = EventRegistry.instance().get_event(guild_id)
         if record:
-            return Event(record['id'])
+            return Event(record=record)
         else:
             return None
 
+    @staticmethod
+    def get_many(ids):
+        """
+        Get a list of events by their ids, with one query
+        :param ids:
+        :return: dict Event objects keyed by id
+        """
+        db = Database.instance()
+        records = db.get_all('events', {'id': list(ids)})
+        return {record['id']: Event(record=record) for record in records}
+
+    @staticmethod
+    async def run_tasks(tasks, bot):
+        """
+        Run all of the due scheduled tasks of one type (start or end), loading their events together
+        :param tasks:
+        :param bot:
+        :return: dict
+        """
+        events = Event.get_many(set(task.object_id for task in tasks))
+        results = {}
+
+        for task in tasks:
+            event = events.get(task.object_id)
+            if event is not None:
+                results[task.id] = await Task.run_safely(task, getattr(event, 'task_' + str(task.type))(bot))
+            else:
+                # If the event doesn't exist, then we can just delete this task.
+                results[task.id] = True
+
+        return results
+
     @staticmethod
     def create(guild, channel, title):
         """
@@ -545,4 +627,13 @@ class Event:
         :return:
         """
         db = Database.instance()
-        return db.insert('events', {'guild': guild, 'channel': channel, 'title': title})
\ No newline at end of file
+        result = db.insert('events', {'guild': guild, 'channel': channel, 'title': title})
+
+        # Add the new record to the registry, so it is picked up as the current event on the guild
+        EventRegistry.instance().set_event(db.get('events', {'guild': guild, 'ended': 0}, ['*'], ['id DESC']))
+        return result
+
+
+# Register the scheduled task handlers. These are batched so that all the events due in one pass are loaded together.
+for type in Event.TASKS.values():
+    Task.register('event', type, Event.run_tasks, batch=True)
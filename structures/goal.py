@@ -1,31 +1,92 @@
-import lib, pytz, time
+import lib
 from structures.db import Database
-from structures.user import User
+from structures.clock import Clock
+from structures.task import Task
 
 class Goal:
 
+    RESET_CHUNK = 5000 # Maximum number of goals to reset in each bulk query
+
     def __init__(self):
         self.__db = Database.instance()
         pass
 
     async def task_reset(self, bot):
         """
-        The scheduled task to reset user goals at midnight
+        The scheduled task to reset user goals at midnight.
+        Goals are grouped by their user's timezone and the goal type, since every goal in a group has the same next reset
+        time and history date. Each group is then reset with bulk queries, rather than a few queries per goal.
         :param bot:
         :return:
         """
-        # Find all the user_goal records which are due a reset
-        now = int(time.time())
+        # Find all the user_goal records which are due a reset, along with their user's timezone setting
+        now = int(Clock.get().time())
+
+        records = self.__db.get_all_sql('SELECT g.*, s.value AS timezone FROM user_goals g '
+                                        'LEFT JOIN user_settings s ON s.user = g.user AND s.setting = %s '
+                                        'WHERE g.reset <= %s ORDER BY s.id ASC', ['timezone', now])
 
-        records = self.__db.get_all_sql('SELECT * FROM user_goals WHERE reset <= %s', [now])
+        # If a user has more than one timezone setting we get the goal more than once, so use the last one, the same as User.get_setting().
+        goals = {}
         for record in records:
+            goals[record['id']] = record
+
+        groups = {}
+        for record in goals.values():
+            key = (record['timezone'] or 'UTC', record['type'])
+            groups.setdefault(key, []).append(record)
+
+        # Get the period boundaries of every timezone we need, for each type of goal.
+        boundaries = {}
+        for type in set(type for timezone, type in groups):
+            boundaries[type] = lib.get_period_boundaries_many([timezone for timezone, group_type in groups if group_type == type], type)
+
+        for (timezone, type), group in groups.items():
+
+            # The next reset time and the period which has just ended are the same for everyone in this group.
+            period = boundaries[type].get(timezone)
+            if period is None:
+                lib.out('[ERROR] Invalid timezone (' + timezone + ') for ' + str(len(group)) + ' ' + type + ' goals')
+                continue
+
+            next = period['next']
+            period_start, period_end = period['previous']
+
+            lib.debug('Resetting ' + str(len(group)) + ' ' + type + ' goals in ' + timezone + ', next reset time: ' + str(next))
 
-            # Calculate the next reset time for the goal, depending on its type.
-            user = User(record['user'], 0)
-            try:
-                user.reset_goal(record)
-            except pytz.exceptions.UnknownTimeZoneError:
-                lib.out('[ERROR] Invalid timezone (' + user.get_setting('timezone') + ') for user ' + str(record['user']))
+            for i in range(0, len(group), self.RESET_CHUNK):
+                chunk = group[i:i + self.RESET_CHUNK]
+
+                # The history and the reset are saved together, so if anything fails neither is, and the goals are just
+                # picked up again on the next run rather than getting their history written twice.
+                with self.__db.transaction():
+
+                    # Add the current values to the history table.
+                    self.__db.insert_many('user_goals_history', [{
+                        'user': record['user'],
+                        'type': record['type'],
+                        'period_start': period_start,
+                        'period_end': period_end,
+                        'goal': record['goal'],
+                        'result': record['current'],
+                        'completed': record['completed']
+                    } for record in chunk])
+
+                    # Update the goal records with the new reset time, resetting the completed and current values to 0.
+                    self.__db.update('user_goals', {'completed': 0, 'current': 0, 'reset': next}, {'id': [record['id'] for record in chunk]})
 
         return True
 
+    async def run_task(task, bot):
+        """
+        Run a scheduled goal task
+        :param task:
+        :param bot:
+        :return: bool
+        """
+        goal = Goal()
+        return await getattr(goal, 'task_' + str(task.type))(bot)
+
+
+# Register the scheduled task handlers.
+Task.register('goal', 'reset', Goal.run_task)
@@ -1,6 +1,7 @@
 import lib
 from operator import itemgetter
 from structures.db import Database
+from structures.leaderboard import Leaderboard
 from structures.user import User
 
 class Guild:
@@ -13,16 +14,12 @@ class Guild:
         self.__db = Database.instance()
         self._guild = guild
         self._id = guild.id
-        self._members = [member.id for member in self._guild.members]
         self._settings = None
         self._disabled = None
 
     def get_id(self):
         return self._id
 
-    def get_members_in_sql(self):
-        return ', '.join(str(m) for m in self._members)
-
     def get_settings(self):
 
         # If the settings property is None, then load it up first
@@ -57,6 +54,10 @@ class Guild:
 
     def update_setting(self, setting, value):
 
+        # If the language is changing, the cached one needs to be looked up again
+        if setting == 'lang':
+            lib.forget_lang(self._id)
+
         # If the user already has a value for this setting, we want to update
         user_setting = self.get_setting(setting)
 
@@ -99,20 +100,37 @@ class Guild:
         Get the top {self.TOP_LIMIT} users in a guild, ordered by their XP
         :return: array
         """
-
-        # Build the SQL query using the IDs of the guild members
-        sql = 'SELECT user FROM user_xp WHERE user IN (' + self.get_members_in_sql() + ') ORDER BY xp DESC LIMIT ' + str(self.TOP_LIMIT)
-        self.__db.cursor.execute(sql)
-        results = self.__db.cursor.fetchall()
+        leaderboard = Leaderboard.instance()
+        leaderboard.check_loaded(self._guild)
 
         users = []
-        for user in results:
-            guild_member = self._guild.get_member( int(user['user']) )
-            usr = User(user['user'], self._id, None, guild_member.display_name)
+        for record in leaderboard.get_top(self._id, self.TOP_LIMIT):
+            guild_member = self._guild.get_member( int(record['user']) )
+            usr = User.get(record['user'], self._id, None, guild_member.display_name if guild_member else str(record['user']))
+            usr.set_xp(record)
             users.append( usr )
 
         return users
 
+    def get_xp_rank(self, user_id):
+        """
+        Get a user's position on the xp leaderboard of the guild
+        :param user_id:
+        :return: int|None
+        """
+        leaderboard = Leaderboard.instance()
+        leaderboard.check_loaded(self._guild)
+        return leaderboard.get_rank(self._id, user_id)
+
+    def count_xp_users(self):
+        """
+        Get the number of members of the guild who have any xp
+        :return: int
+        """
+        leaderboard = Leaderboard.instance()
+        leaderboard.check_loaded(self._guild)
+        return leaderboard.count(self._id)
+
     def get_from_bot(bot, guild_id):
         """
         Load the guild object from the bot.
@@ -0,0 +1,207 @@
+import bisect
+from structures.db import Database
+from structures.singleton import Singleton
+
+@Singleton
+class Leaderboard:
+    """
+    In-memory xp ranking of the members of each guild.
+    A guild's ranking is built from the xp of its members the first time it is needed, and after that it is kept up to
+    date as users gain xp, or join and leave the guild. Each ranking is kept sorted, so the top users are just the start
+    of the list and a user's rank is a binary search, however many members the guild has.
+    """
+
+    # Number of user ids to look up at once, when building the ranking of a guild.
+    LOAD_CHUNK = 5000
+
+    def __init__(self):
+        self.__db = Database.instance()
+        self._rankings = {}
+        self._members = {}
+        self._guilds = {}
+        self._records = {}
+
+    def is_loaded(self, guild):
+        return int(guild) in self._rankings
+
+    def check_loaded(self, guild):
+        """
+        Make sure the ranking of a guild has been built
+        :param guild: The discord guild object, as we need its members
+        :return:
+        """
+        if not self.is_loaded(guild.id):
+            self.load(guild)
+
+    def load(self, guild):
+        """
+        Build the ranking of a guild from the user_xp records of its members.
+        Users who are already in the ranking of another guild are kept up to date, so only the rest are loaded.
+        :param guild: The discord guild object
+        :return: int Number of members with xp
+        """
+        guild_id = int(guild.id)
+        members = set(int(member.id) for member in guild.members)
+
+        # The user column is text, so the ids are compared as strings to make use of the index.
+        missing = [str(user) for user in members if user not in self._guilds]
+        for i in range(0, len(missing), self.LOAD_CHUNK):
+            for record in self.__db.get_all('user_xp', {'user': missing[i:i + self.LOAD_CHUNK]}, ['id', 'user', 'xp']):
+                self.set_record(record)
+
+        self._members[guild_id] = members
+        self._rankings[guild_id] = sorted(self.get_key(user) for user in members if user in self._records)
+        for user in members:
+            self._guilds.setdefault(user, set()).add(guild_id)
+
+        return len(self._rankings[guild_id])
+
+    def set_record(self, record):
+        """
+        Store a user_xp record, keeping the highest one if a user has more than one
+        :param record:
+        :return:
+        """
+        current = self._records.get(int(record['user']))
+        if current is None or int(record['xp']) > int(current['xp']):
+            self._records[int(record['user'])] = {'id': record['id'], 'user': int(record['user']), 'xp': int(record['xp'])}
+
+    def get_key(self, user):
+        """
+        Get the position key of a user in the rankings. Highest xp first, then by user id if the xp is the same.
+        :param user:
+        :return: tuple
+        """
+        return -self._records[user]['xp'], user
+
+    def get_top(self, guild, limit):
+        """
+        Get the user_xp records of the users with the most xp on a guild
+        :param guild:
+        :param limit:
+        :return: list
+        """
+        return [self._records[user] for xp, user in self._rankings.get(int(guild), [])[:limit]]
+
+    def get_rank(self, guild, user):
+        """
+        Get the position of a user in the ranking of a guild
+        :param guild:
+        :param user:
+        :return: int|None None if the user has no xp on the guild
+        """
+        guild = int(guild)
+        user = int(user)
+        if user not in self._records or user not in self._members.get(guild, set()):
+            return None
+
+        return bisect.bisect_left(self._rankings[guild], self.get_key(user)) + 1
+
+    def count(self, guild):
+        """
+        Get the number of members of a guild who have xp
+        :param guild:
+        :return: int
+        """
+        return len(self._rankings.get(int(guild), []))
+
+    def update(self, user, record):
+        """
+        Update a user's xp in every ranking they are in
+        :param user:
+        :param record: Their user_xp record, or None if it has been deleted
+        :return:
+        """
+        user = int(user)
+        guilds = self._guilds.get(user)
+        if guilds is None:
+            return
+
+        # Take them out of the rankings at their old position, then put them back in at the new one.
+        for guild in guilds:
+            self.remove_from_ranking(guild, user)
+
+        self._records.pop(user, None)
+        if record is not None:
+            self.set_record(record)
+            for guild in guilds:
+                bisect.insort(self._rankings[guild], self.get_key(user))
+
+    def add_member(self, guild, user):
+        """
+        Add a new member to the ranking of a guild, if it has been built
+        :param guild:
+        :param user:
+        :return:
+        """
+        guild = int(guild)
+        user = int(user)
+        if not self.is_loaded(guild) or user in self._members[guild]:
+            return
+
+        if user not in self._guilds:
+            record = self.__db.get('user_xp', {'user': str(user)}, ['id', 'user', 'xp'], ['xp DESC'])
+            if record:
+                self.set_record(record)
+
+        self._members[guild].add(user)
+        self._guilds.setdefault(user, set()).add(guild)
+        if user in self._records:
+            bisect.insort(self._rankings[guild], self.get_key(user))
+
+    def remove_member(self, guild, user):
+        """
+        Remove a member who has left a guild from its ranking, if it has been built
+        :param guild:
+        :param user:
+        :return:
+        """
+        guild = int(guild)
+        user = int(user)
+        if not self.is_loaded(guild) or user not in self._members[guild]:
+            return
+
+        self.remove_from_ranking(guild, user)
+        self._members[guild].discard(user)
+        self.forget_guild(user, guild)
+
+    def remove_guild(self, guild):
+        """
+        Remove the ranking of a guild, e.g. when the bot leaves it
+        :param guild:
+        :return:
+        """
+        guild = int(guild)
+        for user in self._members.pop(guild, set()):
+            self.forget_guild(user, guild)
+
+        self._rankings.pop(guild, None)
+
+    def remove_from_ranking(self, guild, user):
+        """
+        Remove a user from the ranking of a guild, using a binary search to find them
+        :param guild:
+        :param user:
+        :return:
+        """
+        if user not in self._records:
+            return
+
+        ranking = self._rankings[guild]
+        key = self.get_key(user)
+        position = bisect.bisect_left(ranking, key)
+        if position < len(ranking) and ranking[position] == key:
+            del ranking[position]
+
+    def forget_guild(self, user, guild):
+        """
+        Stop tracking a guild for a user, and stop tracking the user altogether once they are in no rankings
+        :param user:
+        :param guild:
+        :return:
+        """
+        guilds = self._guilds.get(user, set())
+        guilds.discard(guild)
+        if not guilds:
+            self._guilds.pop(user, None)
+            self._records.pop(user, None)
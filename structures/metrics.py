@@ -0,0 +1,153 @@
+import json, time
+from structures.singleton import Singleton
+
+@Singleton
+class Metrics:
+    """
+    Process-wide store of runtime measurements, such as how late scheduled tasks are running and how long they take.
+    The summary is shown by the `admin metrics` command and written out to FILE after each scheduler pass.
+    """
+
+    FILE = 'logs/metrics.json'
+
+    def __init__(self):
+        self._started = int(time.time())
+        self._tasks = {}
+        self._ticks = {'count': 0, 'tasks': 0, 'duration_total': 0.0, 'duration_max': 0.0, 'pending_max': 0}
+        self._counters = {}
+        self._caches = {}
+
+    def record_task(self, key, lag, duration, failed=False):
+        """
+        Record a single run of a scheduled task
+        :param key: The task key, in the format `object:type`, e.g. `sprint:end`
+        :param lag: Seconds between the scheduled time and the actual start, or None if the task had no scheduled time
+        :param duration: Seconds taken to run the task
+        :param failed: Whether the task raised an exception
+        :return:
+        """
+        stats = self._tasks.get(key)
+        if stats is None:
+            stats = {'runs': 0, 'failures': 0, 'lagged': 0, 'lag_total': 0.0, 'lag_max': 0.0, 'duration_total': 0.0, 'duration_max': 0.0}
+            self._tasks[key] = stats
+
+        stats['runs'] += 1
+        stats['duration_total'] += duration
+        stats['duration_max'] = max(stats['duration_max'], duration)
+
+        if failed:
+            stats['failures'] += 1
+
+        if lag is not None:
+            stats['lagged'] += 1
+            stats['lag_total'] += lag
+            stats['lag_max'] = max(stats['lag_max'], lag)
+
+    def record_tick(self, pending, duration):
+        """
+        Record a full pass of the scheduled task loop
+        :param pending: Number of pending tasks picked up in this pass
+        :param duration: Seconds taken to run the whole pass
+        :return:
+        """
+        self._ticks['count'] += 1
+        self._ticks['tasks'] += pending
+        self._ticks['duration_total'] += duration
+        self._ticks['duration_max'] = max(self._ticks['duration_max'], duration)
+        self._ticks['pending_max'] = max(self._ticks['pending_max'], pending)
+
+    def record_cache(self, name, event):
+        """
+        Record a lookup or eviction in one of the in-memory caches
+        :param name: The name of the cache, e.g. `user_settings`
+        :param event: `hits`, `misses` or `evictions`
+        :return:
+        """
+        stats = self._caches.get(name)
+        if stats is None:
+            stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+            self._caches[name] = stats
+
+        stats[event] += 1
+
+    def increment(self, name, amount=1):
+        """
+        Increment a named counter
+        :param name:
+        :param amount:
+        :return:
+        """
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def get_counter(self, name):
+        """
+        Get the current value of a named counter
+        :param name:
+        :return: int
+        """
+        return self._counters.get(name, 0)
+
+    def get_tasks(self):
+        """
+        Get the summary of each task key, with the averages calculated
+        :return: dict
+        """
+        summary = {}
+        for key, stats in sorted(self._tasks.items()):
+            summary[key] = {
+                'runs': stats['runs'],
+                'failures': stats['failures'],
+                'lag_avg': round(stats['lag_total'] / stats['lagged'], 3) if stats['lagged'] > 0 else None,
+                'lag_max': round(stats['lag_max'], 3),
+                'duration_avg': round(stats['duration_total'] / stats['runs'], 3),
+                'duration_max': round(stats['duration_max'], 3),
+            }
+        return summary
+
+    def get_caches(self):
+        """
+        Get the summary of each cache, with the hit rate calculated
+        :return: dict
+        """
+        summary = {}
+        for name, stats in sorted(self._caches.items()):
+            lookups = stats['hits'] + stats['misses']
+            summary[name] = dict(stats, hit_rate=round(stats['hits'] / lookups, 3) if lookups > 0 else None)
+        return summary
+
+    def get_ticks(self):
+        """
+        Get the summary of the scheduler passes
+        :return: dict
+        """
+        count = self._ticks['count']
+        return {
+            'count': count,
+            'tasks': self._ticks['tasks'],
+            'pending_max': self._ticks['pending_max'],
+            'duration_avg': round(self._ticks['duration_total'] / count, 3) if count > 0 else None,
+            'duration_max': round(self._ticks['duration_max'], 3),
+        }
+
+    def get_summary(self):
+        """
+        Get everything we have recorded, as a dictionary which can be serialised to JSON
+        :return: dict
+        """
+        return {
+            'since': self._started,
+            'updated': int(time.time()),
+            'ticks': self.get_ticks(),
+            'tasks': self.get_tasks(),
+            'caches': self.get_caches(),
+            'counters': dict(sorted(self._counters.items())),
+        }
+
+    def save(self, file=None):
+        """
+        Write the summary out to the metrics file
+        :param file:
+        :return:
+        """
+        with open(file or self.FILE, 'w') as handle:
+            json.dump(self.get_summary(), handle, indent=4)
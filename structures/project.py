@@ -129,7 +129,7 @@ class Project:
         :return:
         """
         self._words += int(amount)
-        return self.__db.update('projects', {'words': self._words}, {'id': self._id})
+        return self.__db.execute('UPDATE projects SET words = words + %s WHERE id = %s', [int(amount), self._id])
 
     def update(self, amount):
         """
@@ -232,6 +232,25 @@ class Project:
 
         return projects
 
+    def add_words_many(amounts):
+        """
+        Add words to the word counts of a number of projects, with one query
+        :param amounts: dict Words to add, keyed by project id
+        :return:
+        """
+        if not amounts:
+            return 0
+
+        db = Database.instance()
+        params = []
+        for id, amount in amounts.items():
+            params += [id, int(amount)]
+
+        params += list(amounts.keys())
+        sql = 'UPDATE projects SET words = words + CASE id ' + ' '.join(['WHEN %s THEN %s'] * len(amounts)) + ' END ' \
+              'WHERE id IN (' + ', '.join(['%s'] * len(amounts)) + ')'
+        return db.execute(sql, params)
+
     def create(user, shortname, name):
         """
         Create a new project
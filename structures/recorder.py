@@ -0,0 +1,121 @@
+from structures.db import Database
+from structures.event import Event
+from structures.project import Project
+from structures.user import User
+
+class WordRecorder:
+    """
+    Records words a user has written, wherever they come from (the `wrote` command or sprint results), applying all the
+    effects in one place: their project, the event running on the guild, their stats, their daily word counts and
+    their goals.
+    All the database writes happen in one transaction, then anything which needs to send a message (goals which have
+    been met) is done once it has been committed.
+    """
+
+    # The stats which count the words from each source.
+    SOURCE_STATS = {
+        'wrote': ['total_words_written'],
+        'sprint': ['total_words_written', 'sprints_words_written'],
+    }
+
+    async def record_words(user, guild, amount, project=None, source='wrote', event=None, stats=None):
+        """
+        Record words written by a user
+        :param user: User
+        :param guild: Guild id
+        :param amount: Number of words
+        :param project: Project the words were written for, if any
+        :param source: Where the words came from, either 'wrote' or 'sprint'
+        :param event: The Event running on the guild if it has already been looked up, False if there isn't one, or None to look it up
+        :param stats: dict Any other stats to add to at the same time, e.g. {'sprints_completed': 1}
+        :return: dict Summary of what was recorded, for displaying
+        """
+        amount = int(amount)
+        event = WordRecorder.get_event(guild, event)
+
+        with Database.instance().transaction():
+
+            if project is not None:
+                project.add_words(amount)
+
+            met = WordRecorder.save_words([(user, amount)], guild, source, event, stats)
+
+        # Now the words are saved, deal with any goals they've met.
+        await User.complete_goals_many(met)
+        met = met[0][1] if met else []
+
+        return {
+            'source': source,
+            'amount': amount,
+            'total': user.get_stat('total_words_written'),
+            'project': project,
+            'event': event,
+            'goals': met,
+        }
+
+    async def record_words_many(entries, guild, source='wrote', event=None, stats=None):
+        """
+        Record words written by a number of users at once, e.g. everyone's results from a sprint.
+        Each kind of write is done for everyone together, so the number of queries doesn't grow with the number of users.
+        :param entries: list of dicts, each with the 'user' (User), the 'amount' of words and the id of their 'project' (or None). Each user should only be in the list once.
+        :param guild: Guild id
+        :param source: Where the words came from, either 'wrote' or 'sprint'
+        :param event: The Event running on the guild if it has already been looked up, False if there isn't one, or None to look it up
+        :param stats: dict Any other stats to add to for each user at the same time, e.g. {'sprints_completed': 1}
+        :return: list of (User, list) tuples, with the user_goal records of the goals each user has met
+        """
+        if not entries:
+            return []
+
+        event = WordRecorder.get_event(guild, event)
+
+        # Add up the words for each project, in case more than one user wrote in it.
+        projects = {}
+        for entry in entries:
+            if entry.get('project') is not None:
+                projects[entry['project']] = projects.get(entry['project'], 0) + int(entry['amount'])
+
+        with Database.instance().transaction():
+            Project.add_words_many(projects)
+            met = WordRecorder.save_words([(entry['user'], int(entry['amount'])) for entry in entries], guild, source, event, stats)
+
+        # Now the words are saved, deal with any goals they've met.
+        await User.complete_goals_many(met)
+        return met
+
+    def get_event(guild, event=None):
+        """
+        Get the event to record words against, if there is one running
+        :param guild:
+        :param event: The Event on the guild if it has already been looked up, False if there isn't one, or None to look it up
+        :return: Event|None
+        """
+        if event is None:
+            event = Event.get_by_guild(guild)
+
+        return event if event and event.is_running() else None
+
+    def save_words(entries, guild, source, event, stats):
+        """
+        Save the words written by some users to the event, their stats, their daily word counts and their goals, with
+        one query for each, however many users there are.
+        This doesn't await anything, so it can be used inside a database transaction.
+        :param entries: list of (User, amount) tuples
+        :param guild:
+        :param source:
+        :param event: Event|None
+        :param stats:
+        :return: list of (User, list) tuples, with the user_goal records of the goals each user has just met
+        """
+        if event is not None:
+            event.add_words_many({user.get_id(): amount for user, amount in entries})
+
+        add_stats = []
+        for user, amount in entries:
+            user_stats = {name: amount for name in WordRecorder.SOURCE_STATS[source]}
+            user_stats.update(stats or {})
+            add_stats.append((user, user_stats))
+
+        User.add_stats_many(add_stats)
+        User.add_daily_words_many(guild, entries)
+        return User.update_goals_many(entries)
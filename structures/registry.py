@@ -0,0 +1,286 @@
+from structures.db import Database
+from structures.singleton import Singleton
+
+@Singleton
+class SprintRegistry:
+    """
+    In-memory copy of the sprint which is active on each guild, the users taking part in it and the users who want to
+    be notified about new sprints.
+    It is rebuilt from the database when the bot boots, and after that every change is written to the database first and
+    then applied here, so the common sprint commands can be answered without querying the database.
+    """
+
+    # The same as Sprint.SPRINT_TYPE_NO_WORDCOUNT. The Sprint class uses the registry, so it can't be imported here.
+    NO_WORDCOUNT = "no_wordcount"
+
+    def __init__(self):
+        self.__db = Database.instance()
+        self._loaded = False
+        self._sprints = {}
+        self._users = {}
+        self._undeclared = {}
+        self._subscribers = {}
+
+    def rebuild(self):
+        """
+        Load all the sprints which are not completed, and their users, out of the database
+        :return: int Number of active sprints
+        """
+        self._sprints = {}
+        self._users = {}
+        self._undeclared = {}
+
+        sprints = self.__db.get_all('sprints', {'completed': 0})
+        for record in sprints:
+            self.set_sprint(record)
+
+        if self._users:
+            for record in self.__db.get_all('sprint_users', {'sprint': list(self._users.keys())}):
+                self.set_user(record)
+
+        self._loaded = True
+        return len(self._sprints)
+
+    def check_loaded(self):
+        """
+        Make sure the registry has been built, in case something uses it before the bot has run its setup
+        :return:
+        """
+        if not self._loaded:
+            self.rebuild()
+
+    def get_sprint(self, guild):
+        """
+        Get the sprints record of the active sprint on a guild
+        :param guild:
+        :return: dict|None
+        """
+        self.check_loaded()
+        return self._sprints.get(int(guild))
+
+    def set_sprint(self, record):
+        """
+        Add a sprint to the registry, replacing any other sprint on the same guild
+        :param record:
+        :return:
+        """
+        current = self._sprints.get(int(record['guild']))
+        if current is not None and current['id'] != record['id']:
+            self.remove_sprint(current['id'])
+
+        self._sprints[int(record['guild'])] = record
+        self._users.setdefault(record['id'], {})
+        self._undeclared.setdefault(record['id'], 0)
+
+    def update_sprint(self, id, values):
+        """
+        Update some of the values of a sprint in the registry
+        :param id:
+        :param values:
+        :return:
+        """
+        for record in self._sprints.values():
+            if record['id'] == id:
+                record.update(values)
+                return
+
+    def remove_sprint(self, id):
+        """
+        Remove a sprint and its users from the registry, once it has been completed or cancelled
+        :param id:
+        :return:
+        """
+        for guild, record in list(self._sprints.items()):
+            if record['id'] == id:
+                del self._sprints[guild]
+
+        self._users.pop(id, None)
+        self._undeclared.pop(id, None)
+
+    def get_users(self, sprint):
+        """
+        Get the sprint_users records of a sprint
+        :param sprint:
+        :return: dict Records keyed by user id
+        """
+        self.check_loaded()
+        return self._users.get(sprint, {})
+
+    def get_user(self, sprint, user):
+        """
+        Get the sprint_users record of one user on a sprint
+        :param sprint:
+        :param user:
+        :return: dict|None
+        """
+        return self.get_users(sprint).get(int(user))
+
+    def set_user(self, record):
+        """
+        Add a user's sprint_users record to a sprint in the registry
+        :param record:
+        :return:
+        """
+        if record['sprint'] not in self._users:
+            return
+
+        self.remove_user(record['sprint'], record['user'])
+        self._users[record['sprint']][int(record['user'])] = record
+        self._undeclared[record['sprint']] += self.is_undeclared(record)
+
+    def update_user(self, sprint, user, values):
+        """
+        Update some of the values of a user's sprint_users record in the registry
+        :param sprint:
+        :param user:
+        :param values:
+        :return:
+        """
+        record = self.get_user(sprint, user)
+        if record is not None:
+            self._undeclared[sprint] -= self.is_undeclared(record)
+            record.update(values)
+            self._undeclared[sprint] += self.is_undeclared(record)
+
+    def remove_user(self, sprint, user):
+        """
+        Remove a user from a sprint in the registry
+        :param sprint:
+        :param user:
+        :return:
+        """
+        record = self._users.get(sprint, {}).pop(int(user), None)
+        if record is not None:
+            self._undeclared[sprint] -= self.is_undeclared(record)
+
+    def count_undeclared(self, sprint):
+        """
+        Get the number of users on a sprint who still need to declare their final word count
+        :param sprint:
+        :return: int
+        """
+        self.check_loaded()
+        return self._undeclared.get(sprint, 0)
+
+    def count(self):
+        """
+        Get the number of active sprints
+        :return: int
+        """
+        self.check_loaded()
+        return len(self._sprints)
+
+    def get_subscribers(self, guild):
+        """
+        Get the ids of the users who want to be notified about new sprints on a guild.
+        These are loaded the first time they are needed for each guild.
+        :param guild:
+        :return: set
+        """
+        guild = int(guild)
+        if guild not in self._subscribers:
+            # The guild and value columns are text, so they are compared as strings to make use of the index.
+            records = self.__db.get_all('user_settings', {'guild': str(guild), 'setting': 'sprint_notify', 'value': '1'}, ['user'])
+            self._subscribers[guild] = set(int(row['user']) for row in records)
+
+        return self._subscribers[guild]
+
+    def subscribe(self, guild, user):
+        """
+        Add a user to the subscribers of a guild, if they have been loaded
+        :param guild:
+        :param user:
+        :return:
+        """
+        if int(guild) in self._subscribers:
+            self._subscribers[int(guild)].add(int(user))
+
+    def unsubscribe(self, guild, user):
+        """
+        Remove a user from the subscribers of a guild, if they have been loaded
+        :param guild:
+        :param user:
+        :return:
+        """
+        if int(guild) in self._subscribers:
+            self._subscribers[int(guild)].discard(int(user))
+
+    def is_undeclared(self, record):
+        """
+        Check if a sprint_users record is still waiting for a final word count
+        :param record:
+        :return: int 1 or 0, so it can be added to the count
+        """
+        return 1 if int(record['ending_wc'] or 0) == 0 and record['sprint_type'] != self.NO_WORDCOUNT else 0
+
+
+@Singleton
+class EventRegistry:
+    """
+    In-memory copy of the current event on each guild, which is the one which has not ended yet, whether it has started
+    or not.
+    It is rebuilt from the database when the bot boots, and kept up to date as events are created, saved (which is how
+    they are started and ended) and deleted, so checking for the event on a guild when words are recorded doesn't need
+    to query the database.
+    """
+
+    def __init__(self):
+        self.__db = Database.instance()
+        self._loaded = False
+        self._events = {}
+
+    def rebuild(self):
+        """
+        Load all the events which have not ended out of the database
+        :return: int Number of current events
+        """
+        self._events = {}
+
+        for record in self.__db.get_all('events', {'ended': 0}, ['*'], ['id ASC']):
+            self.set_event(record)
+
+        self._loaded = True
+        return len(self._events)
+
+    def check_loaded(self):
+        """
+        Make sure the registry has been built, in case something uses it before the bot has run its setup
+        :return:
+        """
+        if not self._loaded:
+            self.rebuild()
+
+    def get_event(self, guild):
+        """
+        Get the events record of the current event on a guild
+        :param guild:
+        :return: dict|None
+        """
+        self.check_loaded()
+        return self._events.get(int(guild))
+
+    def set_event(self, record):
+        """
+        Add an event to the registry, replacing any other event on the same guild
+        :param record:
+        :return:
+        """
+        self._events[int(record['guild'])] = record
+
+    def remove_event(self, id):
+        """
+        Remove an event from the registry, once it has ended or been deleted
+        :param id:
+        :return:
+        """
+        for guild, record in list(self._events.items()):
+            if record['id'] == id:
+                del self._events[guild]
+
+    def count(self):
+        """
+        Get the number of current events
+        :return: int
+        """
+        self.check_loaded()
+        return len(self._events)
@@ -1,5 +1,7 @@
-import lib, pytz, time
+import lib, pytz
 from structures.db import Database
+from structures.clock import Clock
+from structures.task import Task
 
 class Reminder:
 
@@ -34,7 +36,7 @@ class Reminder:
         Return basic info for the list of reminders
         @return:
         """
-        now = int(time.time())
+        now = int(Clock.get().time())
         left = self.time - now
 
         if self.channel:
@@ -68,7 +70,7 @@ class Reminder:
         :return: bool
         """
 
-        now = int(time.time())
+        now = int(Clock.get().time())
 
         # Find all reminders which are pending.
         records = self.__db.get_all_sql('SELECT id FROM reminders WHERE time <= %s', [now])
@@ -139,3 +141,17 @@ class Reminder:
         db = Database.instance()
         return db.insert('reminders', params)
 
+    async def run_task(task, bot):
+        """
+        Run a scheduled reminder task
+        @param task:
+        @param bot:
+        @return: bool
+        """
+        reminder = Reminder()
+        return await getattr(reminder, 'task_' + str(task.type))(bot)
+
+
+# Register the scheduled task handlers.
+Task.register('reminder', 'send', Reminder.run_task)
+
@@ -1,9 +1,12 @@
-import lib, math, numpy, time
+import lib, math
+from datetime import datetime, timezone
 from operator import itemgetter
+from structures.buffer import MessageBuffer
 from structures.db import Database
-from structures.event import Event
+from structures.clock import Clock
 from structures.guild import Guild
-from structures.project import Project
+from structures.recorder import WordRecorder
+from structures.registry import SprintRegistry
 from structures.task import Task
 from structures.xp import Experience
 from structures.user import User
@@ -22,6 +25,8 @@ class Sprint:
 
     SPRINT_TYPE_NO_WORDCOUNT = "no_wordcount"
 
+    PERCENTILE_MIN_RESULTS = 20 # Minimum number of sprint results on a server before showing percentiles in the results
+
     def __init__(self, guild_id, bot=None):
 
         # Initialise the database instance and bot (if supplied)
@@ -68,31 +73,38 @@ class Sprint:
 
     def load(self, by='guild'):
         """
-        Try to load the sprint out of the database for the given guild_id
+        Try to load the sprint for the given guild_id out of the registry, or out of the database if loading by id
         :return: bool
         """
         if by == 'id':
-            params = {'id': self._id, 'completed': 0}
+            result = self.__db.get('sprints', {'id': self._id, 'completed': 0})
         else:
-            params = {'guild': self._guild, 'completed': 0}
+            result = SprintRegistry.instance().get_sprint(self._guild)
 
-        result = self.__db.get('sprints', params)
         if result:
-            self._id = result['id']
-            self._guild = result['guild']
-            self._channel = result['channel']
-            self._start = result['start']
-            self._end = result['end']
-            self._end_reference = result['end_reference']
-            self._length = result['length']
-            self._createdby = result['createdby']
-            self._created = result['created']
-            self._completed = result['completed']
+            self.load_record(result)
             return True
         else:
             self._id = None
             return False
 
+    def load_record(self, result):
+        """
+        Load the values from a sprints record onto the object
+        :param result:
+        :return:
+        """
+        self._id = result['id']
+        self._guild = result['guild']
+        self._channel = result['channel']
+        self._start = result['start']
+        self._end = result['end']
+        self._end_reference = result['end_reference']
+        self._length = result['length']
+        self._createdby = result['createdby']
+        self._created = result['created']
+        self._completed = result['completed']
+
     def get_id(self):
         return self._id
 
@@ -137,7 +149,7 @@ class Sprint:
         This is different from checking if it is completed, which is based on the completed field
         :return: bool
         """
-        now = int(time.time())
+        now = int(Clock.get().time())
         return self.exists() and now > self._end
 
     def is_complete(self):
@@ -152,7 +164,7 @@ class Sprint:
         Check if the sprint has started yet
         :return:
         """
-        now = int(time.time())
+        now = int(Clock.get().time())
         return self._start <= now
 
     def is_user_sprinting(self, user_id):
@@ -161,16 +173,14 @@ class Sprint:
         :param int user_id:
         :return:
         """
-        user_ids = self.get_users()
-        return user_id in user_ids
+        return SprintRegistry.instance().get_user(self._id, user_id) is not None
 
     def is_declaration_finished(self):
         """
         Check if everyone sprinting has declared their final word counts
         :return: bool
         """
-        results = self.__db.get_all_sql('SELECT * FROM sprint_users WHERE sprint = %s AND ending_wc = 0 AND (sprint_type IS NULL OR sprint_type != %s)', [self._id, Sprint.SPRINT_TYPE_NO_WORDCOUNT])
-        return len(results) == 0
+        return SprintRegistry.instance().count_undeclared(self._id) == 0
 
     def get_user_sprint(self, user_id):
         """
@@ -178,7 +188,8 @@ class Sprint:
         :param user_id:
         :return:
         """
-        return self.__db.get('sprint_users', {'sprint': self._id, 'user': user_id})
+        record = SprintRegistry.instance().get_user(self._id, user_id)
+        return dict(record) if record is not None else None
 
     def get_users(self):
         """
@@ -186,39 +197,33 @@ class Sprint:
         :bool exclude_non_wordcount_sprinters:
         :return:
         """
-        users = self.__db.get_all('sprint_users', {'sprint': self._id})
-        return [int(row['user']) for row in users]
+        return list(SprintRegistry.instance().get_users(self._id).keys())
 
     def get_notify_users(self):
         """
         Get an array of all the users who want to be notified about new sprints on this server
         :return:
         """
-        notify = self.__db.get_all('user_settings', {'guild': self._guild, 'setting': 'sprint_notify', 'value': 1})
-        notify_ids = [int(row['user']) for row in notify]
+        notify_ids = SprintRegistry.instance().get_subscribers(self._guild)
 
         # We don't need to notify users who are already in the sprint, so we can exclude those
-        users_ids = self.get_users()
-        return numpy.setdiff1d(notify_ids, users_ids).tolist()
+        return sorted(notify_ids - set(self.get_users()))
 
     def get_notifications(self, users):
         """
         Get an array of user mentions for each person in the supplied array of userids
         :return:
         """
-        notify = []
-        for user_id in users:
-            usr = User(user_id, self._guild)
-            notify.append(usr.get_mention())
-        return notify
+        return [f'<@{user_id}>' for user_id in users]
 
     def set_complete(self):
         """
         Mark this sprint as completed in the database and nothing else
         :return: void
         """
-        now = int(time.time())
+        now = int(Clock.get().time())
         self.__db.update('sprints', {'completed': now}, {'id': self._id})
+        SprintRegistry.instance().remove_sprint(self._id)
 
     def set_ended(self):
         """
@@ -226,6 +231,7 @@ class Sprint:
         :return: void
         """
         self.__db.update('sprints', {'end': 0}, {'id': self._id})
+        SprintRegistry.instance().update_sprint(self._id, {'end': 0})
 
     def join(self, user_id, starting_wc=0, sprint_type=None):
         """
@@ -237,14 +243,16 @@ class Sprint:
         """
 
         # Get the current timestamp
-        now = int(time.time())
+        now = int(Clock.get().time())
 
         # If the sprint hasn't started yet, set the user's start time to the sprint start time, so calculations will work correctly.
         if not self.has_started():
            now = self._start
 
         # Insert the sprint_users record
-        self.__db.insert('sprint_users', {'sprint': self._id, 'user': user_id, 'starting_wc': starting_wc, 'current_wc': starting_wc, 'ending_wc': 0, 'timejoined': now, 'sprint_type': sprint_type})
+        record = {'sprint': self._id, 'user': user_id, 'starting_wc': starting_wc, 'current_wc': starting_wc, 'ending_wc': 0, 'timejoined': now, 'sprint_type': sprint_type}
+        self.__db.insert('sprint_users', record)
+        SprintRegistry.instance().set_user(dict(record, project=None, event=None))
 
     def set_project(self, project_id, user_id):
         """
@@ -253,7 +261,9 @@ class Sprint:
         :param user_id:
         :return:
         """
-        return self.__db.update('sprint_users', {'project': project_id}, {'sprint': self._id, 'user': user_id})
+        result = self.__db.update('sprint_users', {'project': project_id}, {'sprint': self._id, 'user': user_id})
+        SprintRegistry.instance().update_user(self._id, user_id, {'project': project_id})
+        return result
 
     def leave(self, user_id):
         """
@@ -262,6 +272,7 @@ class Sprint:
         :return:
         """
         self.__db.delete('sprint_users', {'sprint': self._id, 'user': user_id})
+        SprintRegistry.instance().remove_user(self._id, user_id)
 
     def cancel(self, context):
         """
@@ -270,11 +281,12 @@ class Sprint:
         """
 
         # Load current user
-        user = User(context.message.author.id, context.guild.id, context)
+        user = User.get(context.message.author.id, context.guild.id, context)
 
         # Delete sprints and sprint_users records
         self.__db.delete('sprint_users', {'sprint': self._id})
         self.__db.delete('sprints', {'id': self._id})
+        SprintRegistry.instance().remove_sprint(self._id)
 
         # Delete pending scheduled tasks
         Task.cancel('sprint', self._id)
@@ -308,7 +320,7 @@ class Sprint:
         :return:
         """
         # Build the message to display
-        now = int(time.time())
+        now = int(Clock.get().time())
         delay = lib.secs_to_mins((self._start + 2) - now) # Add 2 seconds in case its slow to post the message. Then it will display the higher minute instead of lower.
         message = lib.get_string('sprint:scheduled', context.guild.id).format( delay['m'], self._length )
 
@@ -340,6 +352,7 @@ class Sprint:
             update['timejoined'] = self._start
 
         self.__db.update('sprint_users', update, {'sprint': self._id, 'user': user_id})
+        SprintRegistry.instance().update_user(self._id, user_id, update)
 
     async def complete(self, context=None, bot=None):
         """
@@ -360,21 +373,30 @@ class Sprint:
         # Mark this sprint as complete so the cron doesn't pick it up and start processing it again
         self.set_complete()
 
-        # Get all the users taking part
-        users = self.get_users()
+        # Get all the users taking part, with their full sprint info
+        user_sprints = self.__db.get_all('sprint_users', {'sprint': self._id})
+
+        # Level up and goal messages are collected up and sent together after the results, instead of one at a time
+        buffer = MessageBuffer()
 
-        # Loop through them and get their full sprint info
-        for user_id in users:
+        # Load all of their xp, stats, records and goals in one go, rather than a few queries per user
+        users = User.get_many([int(row['user']) for row in user_sprints], self._guild, context=context, bot=bot, channel=self.get_channel(), buffer=buffer)
 
-            user = User(user_id, self._guild, context=context, bot=bot, channel=self.get_channel())
-            user_sprint = self.get_user_sprint(user_id)
+        # The words everyone wrote, and the stats of anyone in a non-word count sprint, are saved together after the loop
+        recorded = []
+        completed = []
+        records = []
+
+        # Loop through them and process their results
+        for user_sprint in user_sprints:
+
+            user = users[int(user_sprint['user'])]
 
             # If it's a non-word count sprint, we don't need to do anything with word counts.
             if user_sprint['sprint_type'] == Sprint.SPRINT_TYPE_NO_WORDCOUNT:
 
-                # Just give them the completed sprint stat and XP.
-                await user.add_xp(Experience.XP_COMPLETE_SPRINT)
-                user.add_stat('sprints_completed', 1)
+                # Just give them the completed sprint stat. Their XP is given out with everyone else's at the end.
+                completed.append((user, {'sprints_completed': 1}))
 
                 # Push user to results
                 results.append({
@@ -412,30 +434,12 @@ class Sprint:
                     user_record = user.get_record('wpm')
                     wpm_record = True if user_record is None or wpm > int(user_record) else False
 
-                    # If it is a record, update their record in the database
+                    # If it is a record, it's saved with everyone else's after the loop
                     if wpm_record:
-                        user.update_record('wpm', wpm)
-
-                    # Give them XP for finishing the sprint
-                    await user.add_xp(Experience.XP_COMPLETE_SPRINT)
-
-                    # Increment their stats
-                    user.add_stat('sprints_completed', 1)
-                    user.add_stat('sprints_words_written', wordcount)
-                    user.add_stat('total_words_written', wordcount)
+                        records.append((user, 'wpm', wpm))
 
-                    # Increment their words towards their goal
-                    await user.add_to_goals(wordcount)
-
-                    # If they were writing in a Project, update its word count.
-                    if user_sprint['project'] is not None:
-                        project = Project(user_sprint['project'])
-                        project.add_words(wordcount)
-
-                    # is there an event running on this server?
-                    event = Event.get_by_guild(self._guild)
-                    if event and event.is_running():
-                        event.add_words(user.get_id(), wordcount)
+                    # Their words are added to their project, the event, their stats and their goals after the loop
+                    recorded.append({'user': user, 'amount': wordcount, 'project': user_sprint['project']})
 
                     # Push user to results
                     results.append({
@@ -443,18 +447,28 @@ class Sprint:
                         'wordcount': wordcount,
                         'wpm': wpm,
                         'wpm_record': wpm_record,
+                        'seconds': time_sprinted,
                         'xp': Experience.XP_COMPLETE_SPRINT,
                         'type': user_sprint['sprint_type']
                     })
 
 
 
+        # Record everyone's words at once, along with their completed sprint and any new wpm records
+        User.add_stats_many(completed)
+        User.update_records_many(records)
+        await WordRecorder.record_words_many(recorded, self._guild, source='sprint', stats={'sprints_completed': 1})
+
+        # Add the results to everyone's lifetime sprint statistics
+        self.update_aggregates([result for result in results if result['type'] != Sprint.SPRINT_TYPE_NO_WORDCOUNT])
+
         # Sort the results
         results = sorted(results, key=itemgetter('wordcount'), reverse=True)
 
         # Now loop through them again and apply extra XP, depending on their position in the results
         position = 1
         highest_word_count = 0
+        winners = []
 
         for result in results:
 
@@ -466,19 +480,30 @@ class Sprint:
 
                 extra_xp = math.ceil(Experience.XP_WIN_SPRINT / (self.WINNING_POSITION if is_sprint_winner else position))
                 result['xp'] += extra_xp
-                await result['user'].add_xp(extra_xp)
 
             # If they actually won the sprint, increase their stat by 1
             # Since the results are in order, the highest word count will be set first
             # which means that any subsequent users with the same word count have tied for 1st place
             if position == 1 or result['wordcount'] == highest_word_count:
-                result['user'].add_stat('sprints_won', 1)
+                winners.append((result['user'], {'sprints_won': 1}))
 
             position += 1
 
+        User.add_stats_many(winners)
+
+        # Give everyone their XP for the sprint in one go, then queue up the message for anyone who went up a level
+        levelled_up = Experience.award_xp({result['user'].get_id(): result['xp'] for result in results}, users)
+        for user_id in levelled_up:
+            await users[user_id].say_level_up()
+
         # Post the final message with the results
         if len(results) > 0:
 
+            # Load the server's sprint history to rank the results against. This is loaded in another thread, so the
+            # rest of the bot carries on while it does. NumPy is only imported here, when it's needed.
+            from structures.analytics import SprintAnalytics
+            analytics = await SprintAnalytics.load(guild=self._guild)
+
             position = 1
             message = lib.get_string('sprint:results:header', self._guild)
             for result in results:
@@ -493,6 +518,10 @@ class Sprint:
                     if result['wpm_record'] is True:
                         message = message + lib.get_string('sprint:results:pb', self._guild)
 
+                    # If there is enough history on the server, show how the result ranks against it
+                    if analytics.count() >= self.PERCENTILE_MIN_RESULTS:
+                        message = message + lib.get_string('sprint:results:percentile', self._guild).format(analytics.get_percentile(result['wpm']))
+
                 message = message + '\n'
                 position += 1
 
@@ -502,6 +531,33 @@ class Sprint:
         # Send the message, either via the context or directly to the channel
         await self.say(message, context, bot)
 
+        # Then send any level up and goal messages from the results
+        await buffer.flush(lambda chunk: self.say(chunk, context, bot))
+
+    def update_aggregates(self, results):
+        """
+        Add the word count results of the sprint to each user's running totals in user_sprint_aggregates.
+        Each user has a row for all their sprints, one per sprint length and one per month, so their statistics can be
+        read without going through their whole sprint history.
+        :param results:
+        :return:
+        """
+        if not results:
+            return
+
+        month = datetime.fromtimestamp(int(self._start), timezone.utc).strftime('%Y-%m')
+
+        params = []
+        for result in results:
+            for type, bucket in (('all', ''), ('length', str(self._length)), ('month', month)):
+                params += [result['user'].get_id(), type, bucket, result['wordcount'], result['seconds'], result['wpm']]
+
+        sql = 'INSERT INTO user_sprint_aggregates (user, type, bucket, sprints, words, seconds, best_wpm) ' \
+              'VALUES ' + ', '.join(['(%s, %s, %s, 1, %s, %s, %s)'] * (len(params) // 6)) + ' ' \
+              'ON DUPLICATE KEY UPDATE sprints = sprints + 1, words = words + VALUES(words), seconds = seconds + VALUES(seconds), best_wpm = GREATEST(best_wpm, VALUES(best_wpm))'
+
+        self.__db.execute(sql, params)
+
     async def end(self, context=None, bot=None):
         """
         Mark the 'end' time of the sprint as 0 in the database and ask for final word counts
@@ -530,7 +586,7 @@ class Sprint:
 
         # Convert the minutes to seconds
         delay = int(delay) * 60
-        task_time = int(time.time()) + delay
+        task_time = int(Clock.get().time()) + delay
 
         # Schedule the cron task
         Task.schedule(self.TASKS['complete'], task_time, 'sprint', self._id)
@@ -567,7 +623,7 @@ class Sprint:
         if not self._task_prechecks(bot):
             return True
 
-        now = int(time.time())
+        now = int(Clock.get().time())
 
         # If the sprint has already finished, we don't need to do anything so we can return True and just have the task deleted.
         if self.is_finished() or self.is_complete():
@@ -625,6 +681,7 @@ class Sprint:
         @return:
         """
         self.__db.update('sprints', {'end_reference': end_reference}, {'id': self._id})
+        SprintRegistry.instance().update_sprint(self._id, {'end_reference': end_reference})
 
 
     async def purge_notifications(context):
@@ -634,27 +691,38 @@ class Sprint:
         """
         db = Database.instance()
         count = 0
-        notify = db.get_all('user_settings', {'guild': context.guild.id, 'setting': 'sprint_notify', 'value': 1})
+        notify = db.get_all('user_settings', {'guild': str(context.guild.id), 'setting': 'sprint_notify', 'value': '1'})
         notify_ids = [int(row['user']) for row in notify]
         if notify_ids:
 
             members = await context.guild.query_members(limit=100, cache=False, user_ids=notify_ids)
-
-            # Create a sub method to find a user in the members list by their id
-            def find_member(id):
-                for m in members:
-                    if m.id == id:
-                        return m
-                return None
+            member_ids = set(member.id for member in members)
 
             # Go through the users who want notifications and delete any which aren't in the server now.
+            registry = SprintRegistry.instance()
             for row in notify:
-                if not find_member(int(row['user'])):
+                if int(row['user']) not in member_ids:
                     db.delete('user_settings', {'id': row['id']})
+                    registry.unsubscribe(context.guild.id, row['user'])
                     count += 1
 
         return count
 
+    def set_notify(user, notify):
+        """
+        Set whether a user wants to be notified about new sprints on their guild
+        :param user:
+        :param notify: bool
+        :return:
+        """
+        user.set_guild_setting('sprint_notify', 1 if notify else 0)
+
+        registry = SprintRegistry.instance()
+        if notify:
+            registry.subscribe(user.get_guild(), user.get_id())
+        else:
+            registry.unsubscribe(user.get_guild(), user.get_id())
+
     def calculate_wpm(amount, seconds):
         """
         Calculate words per minute, from words written and seconds
@@ -671,6 +739,9 @@ class Sprint:
         db = Database.instance()
         db.insert('sprints', {'guild': guild, 'channel': channel, 'start': start, 'end': end, 'end_reference': end_reference, 'length': length, 'createdby': createdby, 'created': created})
 
+        # Add the new record to the registry, so it is picked up as the active sprint on the guild
+        SprintRegistry.instance().set_sprint(db.get('sprints', {'guild': guild, 'completed': 0}, ['*'], ['id DESC']))
+
         # Return the new object using this guild id
         return Sprint(guild)
 
@@ -689,3 +760,45 @@ class Sprint:
         else:
             return None
 
+    def get_many(ids):
+        """
+        Get the sprints which are not yet completed, out of a list of sprint ids, with one query
+        :param ids:
+        :return: dict Sprint objects keyed by id
+        """
+        db = Database.instance()
+        sprints = {}
+
+        for record in db.get_all('sprints', {'id': list(ids), 'completed': 0}):
+            sprint = Sprint(None)
+            sprint.load_record(record)
+            sprints[sprint.get_id()] = sprint
+
+        return sprints
+
+    async def run_tasks(tasks, bot):
+        """
+        Run all of the due scheduled tasks of one type (start, end or complete), loading their sprints together
+        :param tasks:
+        :param bot:
+        :return: dict
+        """
+        sprints = Sprint.get_many(set(task.object_id for task in tasks))
+        results = {}
+
+        for task in tasks:
+            sprint = sprints.get(task.object_id)
+            if sprint is not None:
+                results[task.id] = await Task.run_safely(task, getattr(sprint, 'task_' + str(task.type))(bot))
+            else:
+                # If the sprint doesn't exist, then we can just delete this task.
+                results[task.id] = True
+
+        return results
+
+
+# Register the scheduled task handlers. These are batched so that all the sprints due in one pass are loaded together.
+for type in Sprint.TASKS.values():
+    Task.register('sprint', type, Sprint.run_tasks, batch=True)
+
+
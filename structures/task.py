@@ -1,17 +1,32 @@
-import lib, time
+import lib, time, traceback
 from structures.db import Database
+from structures.clock import Clock
+from structures.metrics import Metrics
 
 class Task:
 
-    def __init__(self, id):
+    # Handlers for each kind of task, keyed by (object, type). These are registered by the structures which own the tasks.
+    HANDLERS = {}
+
+    # A task which fails is tried again after RETRY_DELAY seconds, doubling each time, until it has failed MAX_ATTEMPTS
+    # times. Then it is deleted, so something which can never succeed (e.g. a sprint in a deleted channel) isn't run
+    # again and again.
+    MAX_ATTEMPTS = 5
+    RETRY_DELAY = 60
+
+    def __init__(self, id=None, record=None):
         """
-        Load a Task object by its ID
+        Load a Task object by its ID, or from a tasks record we already have
         :param id:
+        :param record:
         """
         self.__db = Database.instance()
         self.id = None
+        self.failed = False
+
+        if record is None:
+            record = self.__db.get('tasks', {'id': id})
 
-        record = self.__db.get('tasks', {'id': id})
         if record:
             self.id = record['id']
             self.type = record['type']
@@ -21,6 +36,7 @@ class Task:
             self.processing = record['processing']
             self.recurring = record['recurring']
             self.run_every_seconds = record['runeveryseconds']
+            self.attempts = int(record.get('attempts') or 0)
 
     def is_valid(self):
         """
@@ -51,110 +67,246 @@ class Task:
         """
         return self.__db.update('tasks', {'processing': value}, {'id': self.id})
 
+    def set_failed(self, error):
+        """
+        Mark the task as failed on this run, and log the error
+        :param error: The exception it raised
+        :return:
+        """
+        self.failed = True
+        code = lib.error(traceback.format_exception(type(error), error, error.__traceback__))
+        lib.out('[TASK] ' + self.get_key() + ' task ' + str(self.id) + ' failed (' + code + '): ' + str(error))
+
+    def get_key(self):
+        """
+        Get the key used to identify this kind of task in the metrics, e.g. `sprint:end`
+        :return: str
+        """
+        return str(self.object) + ':' + str(self.type)
+
     async def run(self, bot):
         """
         Run this task
-        TODO: In the future, make this better. For now it will do.
         :return: bool
         """
+        results = await Task.run_many([self], bot)
+        return results.get(self.id, True)
 
-        # If the task is already processing, don't go any further.
-        if self.is_processing():
-            return True
+    def set_recur(self):
+        """
+        Set the next time this recurring task should be run
+        :return:
+        """
+        now = int(Clock.get().time())
+        next = now + int(self.run_every_seconds)
+        lib.debug('setting next run time for ' + str(self.id) + ' to: ' + str(next))
+        return self.__db.update('tasks', {'time': next}, {'id': self.id})
 
-        # Mark the task as processing so other shards don't pick it up.
-        self.start_processing(1)
+    def delete(self):
+        """
+        Delete the task
+        :return:
+        """
+        return self.__db.delete('tasks', {'id': self.id})
 
-        # Build a variable to store the method name to run
-        method = 'task_' + str(self.type)
+    async def execute_all(bot):
+        """
+        Execute a pass of the scheduled tasks that are currently pending.
+        Tasks with a batch handler are grouped by their object and type, so they can all be run with one call.
+        :return:
+        """
+        started = time.time()
+        now = int(Clock.get().time())
+        db = Database.instance()
 
-        # Start off with a False and see if we can successfully run and turn that to True
-        result = False
+        pending = db.get_all_sql('SELECT * FROM tasks WHERE time <= %s ORDER BY id ASC', [now])
 
-        # Sprint tasks.
-        if self.object == 'sprint':
+        # Build the list of batches to run, keeping them in the order their first task was scheduled.
+        batches = []
+        grouped = {}
+        for row in pending:
 
-            from structures.sprint import Sprint
+            task = Task(record=row)
+            handler = Task.get_handler(task.object, task.type)
 
-            sprint = Sprint.get(self.object_id)
-            if sprint.is_valid():
-                result = await getattr(sprint, method)(bot)
+            if handler is not None and handler['batch']:
+                if task.get_key() not in grouped:
+                    grouped[task.get_key()] = []
+                    batches.append(grouped[task.get_key()])
+                grouped[task.get_key()].append(task)
             else:
-                # If the sprint doesn't exist, then we can just delete this task.
-                result = True
+                batches.append([task])
 
-        elif self.object == 'goal':
+        for batch in batches:
+            await Task.run_many(batch, bot)
 
-            from structures.goal import Goal
+        Metrics.instance().record_tick(len(pending), time.time() - started)
 
-            goal = Goal()
-            result = await getattr(goal, method)(bot)
+    async def run_many(tasks, bot):
+        """
+        Run a list of tasks, which must all have the same object and type
+        :param tasks:
+        :param bot:
+        :return: dict Results of each task, keyed by task id
+        """
+        db = Database.instance()
 
-        elif self.object == 'event':
+        # If a task is already processing, don't go any further with it.
+        tasks = Task.claim([task for task in tasks if not task.is_processing()])
+        if not tasks:
+            return {}
+
+        key = tasks[0].get_key()
+        handler = Task.get_handler(tasks[0].object, tasks[0].type)
+        started = time.time()
+        now = Clock.get().time()
+        results = {}
+
+        try:
+
+            if handler is None:
+                # Invalid task object. May as well just delete these tasks.
+                lib.out('Invalid task object: ' + str(tasks[0].object))
+                results = {task.id: True for task in tasks}
+            elif handler['batch']:
+                results = await handler['method'](tasks, bot)
+            else:
+                for task in tasks:
+                    results[task.id] = await Task.run_safely(task, handler['method'](task, bot))
 
-            from structures.event import Event
+        except Exception as e:
+            # Something failed outside of the individual tasks, e.g. loading the objects for a batch, so none of them ran.
+            for task in tasks:
+                if task.id not in results:
+                    task.set_failed(e)
 
-            event = Event(self.object_id)
-            if event.is_valid():
-                result = await getattr(event, method)(bot)
-            else:
-                # If the event doesn't exist, then we can just delete this task.
-                return True
+        finally:
 
-        elif self.object == 'reminder':
+            Task.record_metrics(tasks, key, started, now)
 
-            from structures.reminder import Reminder
+            # If we finished the task, and it's not a recurring one, delete it.
+            # If it failed, try it again later. Otherwise it can be picked up again on the next pass.
+            finished = [task.id for task in tasks if results.get(task.id) is True and not task.is_recurring()]
+            failed = [task for task in tasks if task.failed and not task.is_recurring() and task.id not in finished]
+            unfinished = [task.id for task in tasks if task.id not in finished and task not in failed]
 
-            reminder = Reminder()
-            result = await getattr(reminder, method)(bot)
+            if finished:
+                db.delete('tasks', {'id': finished})
 
-        else:
-            # Invalid task object. May as well just delete this task.
-            lib.out('Invalid task object: ' + self.object)
-            result = True
+            if failed:
+                Task.retry_later(failed)
 
-        # If we finished the task, and it's not a recurring one, delete it.
-        if result is True and not self.is_recurring():
-            self.delete()
-        else:
-            self.start_processing(0)
+            if unfinished:
+                db.update('tasks', {'processing': 0}, {'id': unfinished})
 
-        # If it's a recurring task, set its next run time.
-        if self.is_recurring():
-            self.set_recur()
+            # If it's a recurring task, set its next run time.
+            for task in tasks:
+                if task.is_recurring():
+                    task.set_recur()
 
-        return result
+        return results
 
-    def set_recur(self):
+    def retry_later(tasks):
         """
-        Set the next time this recurring task should be run
+        Put back some tasks which have failed, to be tried again after a delay which doubles with each failure.
+        Any which have now failed too many times are deleted instead.
+        :param tasks:
         :return:
         """
-        now = int(time.time())
-        next = now + int(self.run_every_seconds)
-        lib.debug('setting next run time for ' + str(self.id) + ' to: ' + str(next))
-        return self.__db.update('tasks', {'time': next}, {'id': self.id})
+        db = Database.instance()
+        now = int(Clock.get().time())
+        retries = []
+        expired = []
+
+        for task in tasks:
+            task.attempts += 1
+            if task.attempts >= Task.MAX_ATTEMPTS:
+                lib.out('[TASK] ' + task.get_key() + ' task ' + str(task.id) + ' failed ' + str(task.attempts) + ' times, so it has been deleted')
+                expired.append(task.id)
+            else:
+                retries.append({'id': task.id, 'time': now + Task.RETRY_DELAY * (2 ** (task.attempts - 1)), 'attempts': task.attempts, 'processing': 0})
 
-    def delete(self):
+        if expired:
+            db.delete('tasks', {'id': expired})
+
+        db.update_many('tasks', retries)
+
+    def claim(tasks):
         """
-        Delete the task
+        Mark tasks as processing, so other shards don't pick them up.
+        The tasks were read at the start of the pass, so the rows are locked and their processing flag checked again
+        first, and only the tasks which nothing else has claimed in the meantime are returned.
+        :param tasks:
+        :return: list The tasks which were claimed
+        """
+        if not tasks:
+            return []
+
+        db = Database.instance()
+        ids = [task.id for task in tasks]
+
+        with db.transaction():
+            sql = 'SELECT id FROM tasks WHERE id IN (' + ', '.join(['%s'] * len(ids)) + ') AND processing = 0 FOR UPDATE'
+            claimed = set(row['id'] for row in db.get_all_sql(sql, ids))
+            if claimed:
+                db.update('tasks', {'processing': 1}, {'id': list(claimed)})
+
+        return [task for task in tasks if task.id in claimed]
+
+    async def run_safely(task, coroutine):
+        """
+        Wait for the handler of one task, so that if it fails the rest of its batch still runs.
+        A failed task is logged and returns False, and run_many then schedules it to be tried again later.
+        :param task:
+        :param coroutine: The handler's coroutine for this task
+        :return: bool
+        """
+        try:
+            return await coroutine
+        except Exception as e:
+            task.set_failed(e)
+            return False
+
+    def record_metrics(tasks, key, started, now):
+        """
+        Record the lag and run time of some tasks which have just been run together, and whether each of them failed.
+        The run time of a batch is shared equally between the tasks in it.
+        :param tasks:
+        :param key:
+        :param started: Real time the tasks started running, to measure how long they took
+        :param now: Time on the scheduling clock when the tasks started, to measure how late they were
         :return:
         """
-        return self.__db.delete('tasks', {'id': self.id})
+        metrics = Metrics.instance()
+        duration = (time.time() - started) / len(tasks)
 
-    async def execute_all(bot):
+        for task in tasks:
+            # Tasks with a time of 0 have never been scheduled, so there is nothing to compare the start time to.
+            lag = now - int(task.time) if int(task.time) > 0 else None
+            metrics.record_task(key, lag, duration, task.failed)
+
+    def register(object, type, method, batch=False):
         """
-        Execute a pass of the scheduled tasks that are currently pending
+        Register the method which handles a type of task.
+        Normal handlers are called as `method(task, bot)` and return a bool.
+        Batch handlers are called once per pass with all of the due tasks, as `method(tasks, bot)`, and return a dict of bool results keyed by task id.
+        They should run each task through Task.run_safely, so one failing task doesn't stop the others.
+        :param object:
+        :param type:
+        :param method:
+        :param batch:
         :return:
         """
-        now = int(time.time())
-        db = Database.instance()
+        Task.HANDLERS[(object, type)] = {'method': method, 'batch': batch}
 
-        pending = db.get_all_sql('SELECT id FROM tasks WHERE time <= %s ORDER BY id ASC', [now])
-        for row in pending:
-            task = Task(row['id'])
-            if task.is_valid():
-                result = await task.run(bot)
+    def get_handler(object, type):
+        """
+        Get the registered handler for a type of task
+        :param object:
+        :param type:
+        :return: dict|None
+        """
+        return Task.HANDLERS.get((object, type))
 
     def cancel(object, object_id, type=None):
         """
@@ -187,10 +339,10 @@ class Task:
         """
         db = Database.instance()
 
-        # If this task already exists, just update its time.
+        # If this task already exists, just update its time, starting its attempts again.
         record = Task.get(type, object, object_id)
         if record:
-            return db.update('tasks', {'time': time}, {'id': record['id']})
+            return db.update('tasks', {'time': time, 'attempts': 0}, {'id': record['id']})
         else:
             # Otherwise, create one.
             return db.insert('tasks', {'type': type, 'time': time, 'object': object, 'objectid': object_id})
\ No newline at end of file
@@ -1,25 +1,173 @@
-import lib, math, time
+import contextvars, lib, math, time
+from datetime import timedelta
+from structures.cache import Cache
+from structures.clock import Clock
 from structures.db import Database
+from structures.leaderboard import Leaderboard
 from structures.project import Project
 from structures.reminder import Reminder
 from structures.xp import Experience
 
+# The User objects already created while running the current command, keyed by (user, guild). See User.get.
+IDENTITY_MAP = contextvars.ContextVar('user_identity_map', default=None)
+
+# Each user's settings, keyed by user id. These are read by a lot of commands but rarely change.
+SETTINGS_CACHE = Cache('user_settings', 10000, 600)
+
 class User:
 
-    def __init__(self, id, guild, context=None, name=None, bot=None, channel=None):
+    # Number of periods to show on each page of goal history
+    GOAL_HISTORY_PERIODS = {'daily': 14, 'weekly': 4, 'monthly': 12, 'yearly': 10}
+
+    # Number of days of writing activity to show
+    ACTIVITY_DAYS = 30
+
+    def __init__(self, id, guild, context=None, name=None, bot=None, channel=None, buffer=None):
 
         # Initialise the database instance
         self.__db = Database.instance()
         self.__context = context
         self.__bot = bot
         self.__channel = channel
+        self.__buffer = buffer
         self._id = int(id)
         self._guild = int(guild)
         self._name = name
         self._xp = None
+        self._xp_loaded = False
         self._stats = None
         self._settings = None
         self._records = None
+        self._goals = None
+
+    def begin_identity_map():
+        """
+        Start a new identity map for the current command. Until the command finishes, User.get will return the same
+        object for the same user and guild, so anything it has already loaded doesn't need loading again.
+        Each command runs in its own asyncio task, with its own copy of the context, so they can't see each other's users.
+        :return:
+        """
+        IDENTITY_MAP.set({})
+
+    def get(id, guild, context=None, name=None, bot=None, channel=None):
+        """
+        Get the User object for a user on a guild, reusing the one already created during this command if there is one.
+        Outside of a command (e.g. in scheduled tasks) this just creates a new User.
+        :param id:
+        :param guild:
+        :param context:
+        :param name:
+        :param bot:
+        :param channel:
+        :return: User
+        """
+        identity_map = IDENTITY_MAP.get()
+        if identity_map is None:
+            return User(id, guild, context=context, name=name, bot=bot, channel=channel)
+
+        key = (int(id), int(guild))
+        user = identity_map.get(key)
+        if user is None:
+            user = User(id, guild, context=context, name=name, bot=bot, channel=channel)
+            identity_map[key] = user
+        else:
+            # Fill in anything the earlier caller didn't have.
+            user.__context = user.__context or context
+            user.__bot = user.__bot or bot
+            user.__channel = user.__channel or channel
+            user._name = user._name or name
+
+        return user
+
+    def get_many(ids, guild, context=None, bot=None, channel=None, buffer=None):
+        """
+        Get User objects for a list of user ids, with their xp, stats, records, goals and settings already loaded.
+        This uses one query per table, however many users there are, so it can be used for things like sprint results.
+        :param ids:
+        :param guild:
+        :param context:
+        :param bot:
+        :param channel:
+        :param buffer:
+        :return: dict Users keyed by user id
+        """
+        db = Database.instance()
+        users = {}
+        for id in ids:
+            user = User(id, guild, context=context, bot=bot, channel=channel, buffer=buffer)
+            user._xp_loaded = True
+            user._stats = {}
+            user._records = {}
+            user._goals = {}
+            users[user.get_id()] = user
+
+        if not users:
+            return users
+
+        # The user columns are text, so the ids are compared as strings to make use of the indexes.
+        ids = [str(id) for id in users.keys()]
+
+        for row in db.get_all('user_xp', {'user': ids}):
+            users[int(row['user'])].set_xp(row)
+
+        for row in db.get_all('user_stats', {'user': ids}):
+            users[int(row['user'])]._stats[row['name']] = row['value']
+
+        for row in db.get_all('user_records', {'user': ids}):
+            users[int(row['user'])]._records[row['record']] = row['value']
+
+        for row in db.get_all('user_goals', {'user': ids}, ['*'], ['id ASC']):
+            users[int(row['user'])]._goals.setdefault(row['type'], row)
+
+        # Settings may already be cached, so only load the ones which aren't.
+        missing = []
+        for user in users.values():
+            settings = SETTINGS_CACHE.get(user.get_id())
+            if settings is not None:
+                user._settings = dict(settings)
+            else:
+                user._settings = {}
+                missing.append(str(user.get_id()))
+
+        if missing:
+            for row in db.get_all('user_settings', {'user': missing}):
+                users[int(row['user'])]._settings[row['setting']] = row['value']
+
+            for id in missing:
+                SETTINGS_CACHE.set(int(id), dict(users[int(id)]._settings))
+
+        return users
+
+    def load_profile(self):
+        """
+        Load the user's xp, stats, records, goals and settings in one round trip to the database.
+        These are kept on the object, so commands which show a lot of them (e.g. profile) only need the one query.
+        :return:
+        """
+        # The user columns are text, so the id is compared as a string to make use of the indexes.
+        id = str(self._id)
+        xp, stats, records, goals, settings = self.__db.get_all_multi([
+            ('SELECT * FROM user_xp WHERE user = %s', [id]),
+            ('SELECT * FROM user_stats WHERE user = %s', [id]),
+            ('SELECT * FROM user_records WHERE user = %s', [id]),
+            ('SELECT * FROM user_goals WHERE user = %s ORDER BY id ASC', [id]),
+            ('SELECT * FROM user_settings WHERE user = %s', [id]),
+        ])
+
+        self._xp = None
+        self._xp_loaded = True
+        if xp:
+            self.set_xp(xp[0])
+
+        self._stats = {row['name']: row['value'] for row in stats}
+        self._records = {row['record']: row['value'] for row in records}
+        self._settings = {row['setting']: row['value'] for row in settings}
+        SETTINGS_CACHE.set(self._id, dict(self._settings))
+
+        # If there are somehow duplicate goals, use the first one, the same as load_goals.
+        self._goals = {}
+        for row in goals:
+            self._goals.setdefault(row['type'], row)
 
     def get_id(self):
         return self._id
@@ -87,21 +235,48 @@ class User:
         self.__db.delete('user_stats', {'user': self._id})
         self.__db.delete('user_xp', {'user': self._id})
         self.__db.delete('projects', {'user': self._id})
+        self.__db.delete('user_sprint_aggregates', {'user': self._id})
+        self.__db.delete('user_daily_words', {'user': self._id})
+
+        # Forget anything already loaded, so the rest of this command doesn't see the old values
+        self._goals = None
+        self._stats = None
+        self._records = None
+        self._xp = None
+        Leaderboard.instance().update(self._id, None)
+
+    def reset_pb(self):
+        """
+        Reset the user's wpm personal best, including the best wpm in their sprint history
+        :return:
+        """
+        self.update_record('wpm', 0)
+        self.__db.update('user_sprint_aggregates', {'best_wpm': 0}, {'user': self._id})
 
 
     def get_xp(self):
 
-        # If xp is None then we have't got the record yet, so try and get it.
-        if self._xp is None:
+        # If we have't got the record yet, try and get it.
+        if not self._xp_loaded:
             self.load_xp()
 
         return self._xp
 
     def load_xp(self):
         xp = self.__db.get('user_xp', {'user': self._id})
+        self._xp_loaded = True
         if xp:
-            experience = Experience(xp['xp'])
-            self._xp = {'id': xp['id'], 'xp': xp['xp'], 'lvl': experience.get_level(), 'next': experience.get_next_level_xp()}
+            self.set_xp(xp)
+
+    def set_xp(self, xp):
+        """
+        Set the user's xp from their user_xp record
+        :param xp:
+        :return:
+        """
+        experience = Experience(xp['xp'])
+        self._xp = {'id': xp['id'], 'xp': xp['xp'], 'lvl': experience.get_level(), 'next': experience.get_next_level_xp()}
+        self._xp_loaded = True
 
     def get_xp_bar(self):
 
@@ -112,37 +287,38 @@ class User:
         else:
             return None
 
-    def add_xp(self, amount):
-
-        user_xp = self.get_xp()
-        if user_xp:
-            amount += int(user_xp['xp'])
+    async def add_xp(self, amount):
 
-        return self.update_xp(amount)
+        # The xp is added on in the database, so it can't overwrite any other xp they've just been given
+        if self._id in Experience.award_xp({self._id: amount}, {self._id: self}):
+            await self.say_level_up()
 
     async def update_xp(self, amount):
 
         user_xp = self.get_xp()
+        current_level = user_xp['lvl'] if user_xp else 1
 
-        # If they already have an XP record, update it
-        if user_xp:
-            current_level = user_xp['lvl']
-            result = self.__db.update('user_xp', {'xp': amount}, {'id': user_xp['id']})
-        else:
-            # Otherwise, insert a new one
-            current_level = 1
-            result = self.__db.insert('user_xp', {'user': self._id, 'xp': amount})
+        # Insert their XP record, or update it if they already have one
+        result = self.__db.execute('INSERT INTO user_xp (user, xp) VALUES (%s, %s) ON DUPLICATE KEY UPDATE xp = VALUES(xp)', [self._id, amount])
 
-        # Reload the XP onto the user object and into the user_xp variable
-        self.load_xp()
-        user_xp = self.get_xp()
+        # We know what the XP is now, so there's no need to load it back out of the database
+        record = {'id': user_xp['id'] if user_xp else None, 'user': self._id, 'xp': amount}
+        self.set_xp(record)
+        Leaderboard.instance().update(self._id, record)
 
         # If the level now is higher than it was, print the level up message
-        if user_xp['lvl'] > current_level:
-            await self.say(lib.get_string('levelup', self._guild).format(self.get_mention(), user_xp['lvl']))
+        if self.get_xp()['lvl'] > current_level:
+            await self.say_level_up()
 
         return result
 
+    async def say_level_up(self):
+        """
+        Tell the user which level they have just reached
+        :return:
+        """
+        await self.say(lib.get_string('levelup', self._guild).format(self.get_mention(), self.get_xp()['lvl']))
+
     def get_challenge(self):
         return self.__db.get('user_challenges', {'user': self._id, 'completed': 0})
 
@@ -210,6 +386,37 @@ class User:
         # Now return the update_stat with the new amount (if incremented)
         return self.update_stat(name, amount)
 
+    def add_stats(self, stats):
+        """
+        Add to a number of the user's stats at once, e.g. the word counts from a sprint, with one query
+        :param stats: dict Amounts to add, keyed by stat name
+        :return:
+        """
+        User.add_stats_many([(self, stats)])
+
+    def add_stats_many(entries):
+        """
+        Add to the stats of a number of users at once, e.g. everyone's word counts from a sprint, with one query
+        :param entries: list of (User, dict) tuples, with the amounts to add keyed by stat name
+        :return:
+        """
+        rows = [(user, name, int(amount)) for user, stats in entries for name, amount in (stats or {}).items()]
+        if not rows:
+            return
+
+        params = []
+        for user, name, amount in rows:
+            params += [str(user.get_id()), name, amount]
+
+        sql = 'INSERT INTO user_stats (user, name, value) VALUES ' + ', '.join(['(%s, %s, %s)'] * len(rows)) + ' ' \
+              'ON DUPLICATE KEY UPDATE value = value + VALUES(value)'
+        Database.instance().execute(sql, params)
+
+        # If their stats are already loaded, keep them up to date. Otherwise they'll be loaded fresh when needed.
+        for user, name, amount in rows:
+            if user._stats is not None:
+                user._stats[name] = int(user._stats.get(name) or 0) + amount
+
     def get_settings(self):
 
         # If the settings property is None, then load it up first
@@ -232,6 +439,12 @@ class User:
 
     def load_settings(self):
 
+        # If another User object has loaded them recently, they'll be in the cache
+        settings = SETTINGS_CACHE.get(self._id)
+        if settings is not None:
+            self._settings = dict(settings)
+            return
+
         # Get the user_settings records
         records = self.__db.get_all('user_settings', {'user': self._id})
 
@@ -242,13 +455,16 @@ class User:
         for row in records:
             self._settings[row['setting']] = row['value']
 
+        SETTINGS_CACHE.set(self._id, dict(self._settings))
+
     def update_setting(self, setting, value):
 
         # If the user already has a value for this setting, we want to update
         user_setting = self.get_setting(setting)
 
-        # Update the value in the array
+        # Update the value in the array, and make sure nothing uses the old settings from the cache
         self._settings[setting] = value
+        SETTINGS_CACHE.delete(self._id)
 
         if user_setting:
             return self.__db.update('user_settings', {'value': value}, {'user': self._id, 'setting': setting})
@@ -274,6 +490,9 @@ class User:
         :param str value:
         :return: Result of update or insert query
         """
+        # These are loaded along with the rest of their settings, so the cached ones are out of date now
+        SETTINGS_CACHE.delete(self._id)
+
         result = self.get_guild_setting(setting)
         if result:
             return self.__db.update('user_settings', {'value': value}, {'id': result['id']})
@@ -305,19 +524,32 @@ class User:
             self._records[row['record']] = row['value']
 
     def update_record(self, name, value):
+        return User.update_records_many([(self, name, value)])
 
-        # If the user already has a value for this record, we want to update
-        user_record = self.get_record(name)
+    def update_records_many(entries):
+        """
+        Set records of a number of users at once, e.g. everyone's new wpm personal bests from a sprint, with one query.
+        Each record is inserted, or updated if the user already has it.
+        :param entries: list of (User, name, value) tuples
+        :return:
+        """
+        if not entries:
+            return 0
 
-        # Update the value in the array
-        self._records[name] = value
+        params = []
+        for user, name, value in entries:
+            params += [str(user.get_id()), name, value]
 
-        if user_record:
-            return self.__db.update('user_records', {'value': value}, {'user': self._id, 'record': name})
+        sql = 'INSERT INTO user_records (user, record, value) VALUES ' + ', '.join(['(%s, %s, %s)'] * len(entries)) + ' ' \
+              'ON DUPLICATE KEY UPDATE value = VALUES(value)'
+        result = Database.instance().execute(sql, params)
 
-        # Otherwise, we want to insert a new one
-        else:
-            return self.__db.insert('user_records', {'user': self._id, 'record': name, 'value': value})
+        # If their records are already loaded, keep them up to date. Otherwise they'll be loaded fresh when needed.
+        for user, name, value in entries:
+            if user._records is not None:
+                user._records[name] = value
+
+        return result
 
     def calculate_user_reset_time(self, type):
         """
@@ -336,7 +568,30 @@ class User:
         :param type:
         :return:
         """
-        return self.__db.get('user_goals', {'user': self._id, 'type': type})
+        return self.get_goals().get(type)
+
+    def get_goals(self):
+        """
+        Get all of the user's user_goal records, keyed by type
+        :return: dict
+        """
+        # If the goals property is None, then load it up first
+        if self._goals is None:
+            self.load_goals()
+
+        return self._goals
+
+    def load_goals(self):
+
+        # Get the user_goals records
+        records = self.__db.get_all('user_goals', {'user': self._id}, ['*'], ['id ASC'])
+
+        # Reset the goals property
+        self._goals = {}
+
+        # Loop through the results and add to the goals property. If there are somehow duplicates, use the first one.
+        for row in records:
+            self._goals.setdefault(row['type'], row)
 
     def get_goal_progress(self, type):
         """
@@ -380,51 +635,126 @@ class User:
         next_reset = self.calculate_user_reset_time(type)
 
         if user_goal:
+            user_goal['goal'] = value
+            user_goal['reset'] = next_reset
             return self.__db.update('user_goals', {'goal': value, 'reset': next_reset}, {'id': user_goal['id']})
         else:
+            # Reload the goals next time they are needed, so we have the new record's id
+            self._goals = None
             return self.__db.insert('user_goals', {'type': type, 'goal': value, 'user': self._id, 'current': 0, 'completed': 0, 'reset': next_reset})
 
     def delete_goal(self, type):
+        if self._goals is not None:
+            self._goals.pop(type, None)
         return self.__db.delete('user_goals', {'user': self._id, 'type': type})
 
-    async def add_to_goals(self, amount):
+    async def add_to_goals(self, amount, types=None):
         """
-        Add word written to all goals the user is running
+        Add word written to all goals the user is running (or just the given types), updating them all with one query
         :param amount:
+        :param types:
         :return:
         """
-        for goal in ['daily', 'weekly', 'monthly', 'yearly']:
-            await self.add_to_goal(goal, amount)
+        await self.complete_goals(self.update_goals(amount, types))
 
-    async def add_to_goal(self, type, amount):
+    def update_goals(self, amount, types=None):
+        """
+        Add words written to the user's goals in the database, without doing anything about the goals they've now met.
+        This doesn't await anything, so it can be used inside a database transaction.
+        :param amount:
+        :param types:
+        :return: list The user_goal records of the goals which have just been met
+        """
+        updates, met = self.get_goal_updates(amount, types)
+        self.__db.update_many('user_goals', updates)
+        return met
 
-        user_goal = self.get_goal(type)
-        if user_goal:
+    def update_goals_many(entries):
+        """
+        Add words written to the goals of a number of users at once, with one query.
+        This doesn't await anything, so it can be used inside a database transaction.
+        :param entries: list of (User, amount) tuples. Each user should only be in the list once.
+        :return: list of (User, list) tuples, with the user_goal records of the goals each user has just met
+        """
+        updates = []
+        met = []
 
-            value = int(amount) + int(user_goal['current'])
-            if value < 0:
-                value = 0
+        for user, amount in entries:
+            user_updates, user_met = user.get_goal_updates(amount)
+            updates += user_updates
+            if user_met:
+                met.append((user, user_met))
 
-            # Is the goal completed now?
-            already_completed = user_goal['completed']
-            completed = user_goal['completed']
-            if value >= user_goal['goal'] and not already_completed:
-                completed = 1
+        Database.instance().update_many('user_goals', updates)
+        return met
 
-            self.__db.update('user_goals', {'current': value, 'completed': completed}, {'id': user_goal['id']})
+    def get_goal_updates(self, amount, types=None):
+        """
+        Add words written to the user's loaded goals, and work out the changes to save to the database
+        :param amount:
+        :param types:
+        :return: tuple (list of updates for update_many, list of the user_goal records of the goals just met)
+        """
+        updates = []
+        met = []
+
+        for type in types or ['daily', 'weekly', 'monthly', 'yearly']:
 
-            # If we just met the goal, increment the XP and print out a message
-            if completed and not already_completed:
+            user_goal = self.get_goal(type)
+            if user_goal:
 
-                # Increment stat of goals completed
-                self.add_stat(type + '_goals_completed', 1)
+                value = int(amount) + int(user_goal['current'])
+                if value < 0:
+                    value = 0
 
-                # Increment XP
-                await self.add_xp(Experience.XP_COMPLETE_GOAL[type])
+                # Is the goal completed now?
+                already_completed = user_goal['completed']
+                completed = user_goal['completed']
+                if value >= user_goal['goal'] and not already_completed:
+                    completed = 1
+                    met.append(user_goal)
 
-                # Print message
-                await self.say(lib.get_string('goal:met', self._guild).format(self.get_mention(), type, str(user_goal['goal']), str(Experience.XP_COMPLETE_GOAL[type])))
+                user_goal['current'] = value
+                user_goal['completed'] = completed
+                updates.append({'id': user_goal['id'], 'current': value, 'completed': completed})
 
+        return updates, met
+
+    async def complete_goals(self, met):
+        """
+        For any goals just met, increment the stats and XP and print out a message
+        :param met: list of user_goal records
+        :return:
+        """
+        await User.complete_goals_many([(self, met)])
+
+    async def complete_goals_many(met):
+        """
+        For any goals just met by a number of users, increment their stats and XP all together and print out the messages
+        :param met: list of (User, list of user_goal records) tuples
+        :return:
+        """
+        met = [(user, goals) for user, goals in met if goals]
+        if not met:
+            return
+
+        # Increment stat of goals completed, and the XP, for everyone at once
+        User.add_stats_many([(user, {goal['type'] + '_goals_completed': 1 for goal in goals}) for user, goals in met])
+
+        users = {user.get_id(): user for user, goals in met}
+        levelled_up = Experience.award_xp({user.get_id(): sum(Experience.XP_COMPLETE_GOAL[goal['type']] for goal in goals) for user, goals in met}, users)
+
+        # Print messages
+        for user, goals in met:
+            for user_goal in goals:
+                type = user_goal['type']
+                await user.say(lib.get_string('goal:met', user.get_guild()).format(user.get_mention(), type, str(user_goal['goal']), str(Experience.XP_COMPLETE_GOAL[type])))
+
+        for id in levelled_up:
+            await users[id].say_level_up()
+
+    async def add_to_goal(self, type, amount):
+        return await self.add_to_goals(amount, [type])
 
     def update_goal(self, type, amount):
         """
@@ -435,6 +765,7 @@ class User:
         """
         user_goal = self.get_goal(type)
         if user_goal:
+            user_goal['current'] = amount
             return self.__db.update('user_goals', {'current': amount}, {'id': user_goal['id']})
         else:
             return False
@@ -468,12 +799,15 @@ class User:
 
     async def say(self, message):
         """
-        Send a message to the channel, via context if supplied, or direct otherwise
+        Send a message to the channel, via context if supplied, or direct otherwise.
+        If the user has a message buffer, the message is added to that instead, to be sent later.
         :param message:
         :param context:
         :return:
         """
-        if self.__context is not None:
+        if self.__buffer is not None:
+            return self.__buffer.add(message)
+        elif self.__context is not None:
             return await self.__context.send(message)
         elif self.__bot is not None:
             channel = self.__bot.get_channel(int(self.__channel))
@@ -486,65 +820,87 @@ class User:
         """
         return self.__db.get_sql('SELECT * FROM sprint_users WHERE user = %s AND sprint != %s ORDER BY id DESC', [self.get_id(), current_sprint.get_id()])
 
-    def reset_goal(self, record):
+    def get_goal_history(self, type, page=1):
         """
-        Reset a user's goal, inserting the current values into the history table and updating their current record.
-        @param record:
-        @return:
+        Get a page of the user's goal history for the specified goal type.
+        Each page is a window of time, so it can be found with a range on the (user, type, period_start) index, however
+        far back the page is.
+        @param type:
+        @param page:
+        @return: tuple (records, window start, window end)
         """
-        # Add the current values to a new record in the history table.
-        self.__db.insert('user_goals_history', {
-            'user': record['user'],
-            'type': record['type'],
-            'date': self.get_previous_goal_date(record['type']),
-            'goal': record['goal'],
-            'result': record['current'],
-            'completed': record['completed']
-        })
-
-        # Calculate the next reset time for this goal.
-        next = self.calculate_user_reset_time(record['type'])
+        timezone = self.get_setting('timezone') or 'UTC'
+        start, end = lib.get_history_window(timezone, type, page, self.GOAL_HISTORY_PERIODS[type])
 
-        # Print out to the bot log what is happening.
-        lib.debug('Setting next ' + record['type'] + ' goal reset time for ' + str(record['user']) + ' to: ' + str(next))
+        records = self.__db.get_all_sql('SELECT * FROM user_goals_history WHERE user = %s AND type = %s AND period_start >= %s AND period_start < %s ORDER BY period_start DESC', [str(self.get_id()), type, start, end])
+        return records, start, end
 
-        # Update the goal record with the new reset time, resetting the completed and current values to 0.
-        self.__db.update('user_goals', {'completed': 0, 'current': 0, 'reset': next}, {'id': record['id']})
+    def get_local_date(self):
+        """
+        Get today's date in the user's timezone, or in UTC if they haven't set one
+        @return: date
+        """
+        tz = lib.get_timezone(self.get_setting('timezone')) or lib.get_timezone('UTC')
+        return Clock.get().now(tz).date()
 
-    def get_previous_goal_date(self, type):
+    def add_daily_words(self, guild, amount):
         """
-        Given a type of goal, get the previous goal's date, for the history table.
-        E.g. a daily goal would give you yesterday's date. A monthly goal would give you the first of last month.
-        @param type:
+        Add words to the user's total for today (in their timezone) on a guild
+        @param guild:
+        @param amount:
         @return:
         """
-        timezone = self.get_setting('timezone') or 'UTC'
-        return lib.get_previous_date(timezone, type)
+        return User.add_daily_words_many(guild, [(self, amount)])
 
-    def get_goal_history(self, type):
+    def add_daily_words_many(guild, entries):
         """
-        Get the user's goal history for the specified goal type
-        @param type:
+        Add words to today's totals (each in their own timezone) of a number of users on a guild, with one query
+        @param guild:
+        @param entries: list of (User, amount) tuples
         @return:
         """
+        if not entries:
+            return 0
+
+        params = []
+        for user, amount in entries:
+            params += [user.get_id(), user.get_local_date(), int(guild), int(amount)]
+
+        sql = 'INSERT INTO user_daily_words (user, day, guild, words) VALUES ' + ', '.join(['(%s, %s, %s, %s)'] * len(entries)) + ' ' \
+              'ON DUPLICATE KEY UPDATE words = words + VALUES(words)'
+        return Database.instance().execute(sql, params)
+
+    def get_daily_words(self, days):
+        """
+        Get the words the user has written on each of the last few days (in their timezone), on every guild.
+        The rows are keyed by (user, day, guild), so this is a single range scan on the primary key.
+        @param days: Number of days, including today
+        @return: list of (date, words) tuples, oldest first, including any days they didn't write anything
+        """
+        today = self.get_local_date()
+        start = today - timedelta(days=days - 1)
 
-        # Daily goals we want to get a maximum of 14 records.
-        if type == 'daily':
-            max = 14
+        records = self.__db.get_all_sql('SELECT day, SUM(words) AS words FROM user_daily_words WHERE user = %s AND day BETWEEN %s AND %s GROUP BY day', [self.get_id(), start, today])
+        words = {record['day']: int(record['words']) for record in records}
 
-        # Weekly goals we want to get a maximum of 4 results.
-        elif type == 'weekly':
-            max = 4
+        return [(day, words.get(day, 0)) for day in (start + timedelta(days=i) for i in range(days))]
 
-        # Monthly goals we want to get a maximum of 12 results.
-        elif type == 'monthly':
-            max = 12
+    def get_sprint_history(self):
+        """
+        Get the user's lifetime sprint statistics, from the running totals which are updated as each sprint completes
+        @return: dict With 'all' as the overall totals (or None), and 'length' and 'month' as lists of rows
+        """
+        history = {'all': None, 'length': [], 'month': []}
 
-        # Yearly goals we can get as many as we like.
-        else:
-            max = None
+        for row in self.__db.get_all('user_sprint_aggregates', {'user': self.get_id()}):
+            if row['type'] == 'all':
+                history['all'] = row
+            else:
+                history[row['type']].append(row)
 
-        return self.__db.get_all('user_goals_history', {'type': type, 'user': self.get_id()}, '*', ['id DESC'], max)
+        history['length'] = sorted(history['length'], key=lambda row: int(row['bucket']))
+        history['month'] = sorted(history['month'], key=lambda row: row['bucket'], reverse=True)
+        return history
 
     def get_reminders(self):
         """
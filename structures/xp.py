@@ -1,4 +1,6 @@
-import sys, os, lib, math, pymysql, warnings
+import bisect, sys, os, lib, math, pymysql, warnings
+from structures.db import Database
+from structures.leaderboard import Leaderboard
 
 sys.path.append(os.path.abspath('../'))
 
@@ -26,6 +28,12 @@ class Experience:
     This CALC_KEY is used to calculate the level and xp to the desired numbers
     """
 
+    # Number of levels to keep in the boundary table. Anything past this falls back to calculating the level.
+    TABLE_LEVELS = 1000
+
+    # The xp required for each level, in order, so a level can be found with a binary search. Built below the class.
+    LEVEL_BOUNDARIES = []
+
     def __init__(self, xp):
         self._xp = xp
 
@@ -34,6 +42,16 @@ class Experience:
         Given the experience passed into the object, get the current level
         :return: int
         """
+        if self._xp < self.LEVEL_BOUNDARIES[-1]:
+            return bisect.bisect_right(self.LEVEL_BOUNDARIES, self._xp)
+
+        return self.calculate_level()
+
+    def calculate_level(self):
+        """
+        Work out the current level from the xp with the level formula, for xp beyond the boundary table
+        :return: int
+        """
         return math.floor( math.floor(self.XP_CALC_KEY + math.sqrt( (self.XP_CALC_KEY * self.XP_CALC_KEY) + (4 * self.XP_CALC_KEY) * self._xp )) / (2 * self.XP_CALC_KEY) )
 
     def get_xp_boundary(self, lvl):
@@ -51,3 +69,42 @@ class Experience:
         """
         return self.get_xp_boundary( self.get_level() + 1 ) - self._xp
 
+    def award_xp(awards, users=None):
+        """
+        Give xp to a number of users at once, e.g. everyone who took part in a sprint.
+        All of the xp is added in one statement, then the new records are loaded back in one query.
+        :param awards: dict Amount of xp to give, keyed by user id
+        :param users: dict User objects keyed by user id, to update with their new xp
+        :return: set Ids of the users who went up a level
+        """
+        awards = {int(user): amount for user, amount in awards.items() if amount}
+        if not awards:
+            return set()
+
+        db = Database.instance()
+        params = []
+        for user, amount in awards.items():
+            params += [user, amount]
+
+        sql = 'INSERT INTO user_xp (user, xp) VALUES ' + ', '.join(['(%s, %s)'] * len(awards)) + ' ' \
+              'ON DUPLICATE KEY UPDATE xp = xp + VALUES(xp)'
+        db.execute(sql, params)
+
+        # Compare the level each user is on now, against the level they were on before the xp was added.
+        levelled_up = set()
+        leaderboard = Leaderboard.instance()
+        # The user column is text, so the ids are compared as strings to make use of the index.
+        for record in db.get_all('user_xp', {'user': [str(user) for user in awards.keys()]}, ['id', 'user', 'xp']):
+
+            user = int(record['user'])
+            if Experience(int(record['xp'])).get_level() > Experience(int(record['xp']) - awards[user]).get_level():
+                levelled_up.add(user)
+
+            leaderboard.update(user, record)
+            if users is not None and user in users:
+                users[user].set_xp(record)
+
+        return levelled_up
+
+
+Experience.LEVEL_BOUNDARIES = [Experience(0).get_xp_boundary(lvl) for lvl in range(1, Experience.TABLE_LEVELS + 1)]